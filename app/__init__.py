@@ -1,14 +1,23 @@
 import os
+from datetime import datetime
 from flask import Flask
 from .extensions import db, migrate, jwt, cors, scheduler
-from .jobs import tarefa_de_verificacao_diaria
+from .jobs import tarefa_varredura_rastreamento, tarefa_materializar_indicadores, tarefa_atualizar_metricas, tarefa_limpar_exclusoes, tarefa_recuperar_importacoes
 from config import Config
 from .errors import register_error_handlers
+from .utils.calendario import calendario
+from .utils.contador_sql import registrar_contador_sql
+from .utils.serializacao import configurar_json
+from .utils.cache import cache
+
+
+HORARIOS_VARREDURA_RASTREAMENTO = ((11, 30), (16, 0), (17, 30))
 
 
 def create_app(config_class=Config):
     app = Flask(__name__)
     app.config.from_object(config_class)
+    configurar_json(app)
 
     db.init_app(app)
     migrate.init_app(app, db)
@@ -20,6 +29,10 @@ def create_app(config_class=Config):
         os.makedirs(app.config['COMPROVANTES_DIR'])
     except OSError:
         pass
+    os.makedirs(app.config['IMPORTACAO_DIR'], exist_ok=True)
+
+    calendario.configurar(app.config['CALENDARIO_ANO_INICIAL'], app.config['CALENDARIO_ANO_FINAL'])
+    cache.configurar(app)
 
     from .routes.auth import auth_bp
     from .routes.entregas import entrega_bp
@@ -27,6 +40,8 @@ def create_app(config_class=Config):
     from .routes.motoristas import motorista_bp
     from .routes.devolucoes import devolucao_bp
     from .routes.usuarios import usuario_bp
+    from .routes.admin import admin_bp
+    from .routes.feriados import feriado_bp
     
     app.register_blueprint(auth_bp, url_prefix='/api')
     app.register_blueprint(entrega_bp, url_prefix='/api/entregas')
@@ -34,17 +49,75 @@ def create_app(config_class=Config):
     app.register_blueprint(motorista_bp, url_prefix='/api/motoristas')
     app.register_blueprint(devolucao_bp, url_prefix='/api/devolucoes')
     app.register_blueprint(usuario_bp, url_prefix='/api/usuarios')
+    app.register_blueprint(admin_bp, url_prefix='/api/admin')
+    app.register_blueprint(feriado_bp, url_prefix='/api/feriados')
 
     register_error_handlers(app)
+    registrar_contador_sql(app)
 
     if not scheduler.running:
+        # Três varreduras fixas por dia no lugar de três jobs por entrega.
+        for hora, minuto in HORARIOS_VARREDURA_RASTREAMENTO:
+            scheduler.add_job(
+                id=f'tarefa_varredura_rastreamento_{hora:02d}{minuto:02d}',
+                func=tarefa_varredura_rastreamento,
+                trigger='cron',
+                hour=hora,
+                minute=minuto,
+                args=[app],
+                max_instances=1,
+                coalesce=True,
+                replace_existing=True
+            )
+        scheduler.add_job(
+            id='tarefa_materializar_indicadores',
+            func=tarefa_materializar_indicadores,
+            trigger='cron',
+            hour=0,
+            minute=5,
+            args=[app],
+            replace_existing=True
+        )
+        # Na subida e periodicamente: importações sem sinal do processo dono viram FALHOU.
+        scheduler.add_job(
+            id='tarefa_recuperar_importacoes',
+            func=tarefa_recuperar_importacoes,
+            trigger='interval',
+            minutes=app.config['IMPORTACAO_VERIFICACAO_MINUTOS'],
+            next_run_time=datetime.now(),
+            args=[app],
+            max_instances=1,
+            coalesce=True,
+            replace_existing=True
+        )
+        scheduler.add_job(
+            id='tarefa_limpar_exclusoes',
+            func=tarefa_limpar_exclusoes,
+            trigger='cron',
+            hour=0,
+            minute=30,
+            args=[app],
+            replace_existing=True
+        )
+        scheduler.add_job(
+            id='tarefa_atualizar_metricas',
+            func=tarefa_atualizar_metricas,
+            trigger='interval',
+            minutes=app.config['METRICAS_INTERVALO_MINUTOS'],
+            args=[app],
+            replace_existing=True
+        )
+        # O incremental só recalcula o DTFAT atual das linhas alteradas: upserts que mudam
+        # o DTFAT e exclusões deixam o dia antigo desatualizado até a reconstrução.
         scheduler.add_job(
-            id='tarefa_verificacao_diaria',
-            func=tarefa_de_verificacao_diaria,
+            id='tarefa_reconstruir_metricas',
+            func=tarefa_atualizar_metricas,
             trigger='cron',
-            hour=1,
+            hour=app.config['METRICAS_RECONSTRUCAO_HORA'],
             minute=0,
-            args=[app, scheduler],
+            args=[app, True],
+            max_instances=1,
+            coalesce=True,
             replace_existing=True
         )
         scheduler.start()
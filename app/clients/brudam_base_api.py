@@ -1,6 +1,8 @@
 import requests
 import logging
 from config import Config
+from .token_cache import tokens_transportadoras
+from .transporte import transporte
 
 logger = logging.getLogger(__name__)
 
@@ -13,19 +15,24 @@ class BrudamBaseAPI:
         self.token = None
         self.name = "BrudamBase"
 
+    @property
+    def _credenciais(self) -> tuple:
+        return (self.login_url, self.user, self.password)
+
     def _obter_token(self) -> str | None:
-        if self.token:
-            return self.token
-        
+        self.token = tokens_transportadoras.obter(self.name, self._credenciais, self._login)
+        return self.token
+
+    def _login(self) -> str | None:
         headers = {'Content-Type': 'application/json'}
         payload = {"usuario": self.user, "senha": self.password}
         
         try:
-            response = requests.post(self.login_url, json=payload, headers=headers, timeout=10)
+            response = transporte.post(self.login_url, circuito=self.name, json=payload, headers=headers)
             response.raise_for_status()
-            self.token = response.json().get("token")
+            token = response.json().get("token")
             logger.info(f"Token obtido com sucesso para a API {self.name}.")
-            return self.token
+            return token
         except requests.exceptions.RequestException as e:
             logger.error(f"Falha ao obter token para a API {self.name}: {e}")
             return None
@@ -39,10 +46,12 @@ class BrudamBaseAPI:
         headers = {'Authorization': f'Bearer {token}'}
         
         try:
-            response = requests.get(url, headers=headers, timeout=20)
+            response = transporte.get(url, circuito=self.name, headers=headers)
             if response.status_code == 404:
                 logger.warning(f"Nenhum dado de rastreamento encontrado para a chave {chave_nfe} na API {self.name}.")
                 return None
+            if response.status_code == 401:
+                tokens_transportadoras.invalidar(self.name, self._credenciais, token)
             response.raise_for_status()
             return response.json()
         except requests.exceptions.RequestException as e:
@@ -7,6 +7,8 @@ from urllib.parse import quote_plus
 from datetime import datetime, date
 
 from app.utils.file_handler import baixar_e_salvar_comprovante
+from .token_cache import tokens_transportadoras
+from .transporte import transporte
 
 logger = logging.getLogger(__name__)
 
@@ -20,7 +22,15 @@ class EVSAPI:
         self.sigla = Config.EVS_SIGLA
         self.token = None
 
+    @property
+    def _credenciais(self) -> tuple:
+        return (self.login_url, self.user, self.senha, self.sigla)
+
     def _get_token(self) -> str | None:
+        self.token = tokens_transportadoras.obter('EVS', self._credenciais, self._login)
+        return self.token
+
+    def _login(self) -> str | None:
         headers = {
             "Content-Type": "application/json"
         }
@@ -33,16 +43,16 @@ class EVSAPI:
 
         try:
             logger.info(f"Tentando obter token da EVS em: {self.login_url}")
-            response = requests.post(self.login_url, headers=headers, data=json.dumps(payload))
+            response = transporte.post(self.login_url, circuito='EVS', headers=headers, data=json.dumps(payload))
             response.raise_for_status() 
             data = response.json()
 
             token_key = "token"
-            self.token = data.get(token_key)
+            token = data.get(token_key)
 
-            if self.token:
+            if token:
                 logger.info("Token EVS obtido com sucesso.")
-                return self.token
+                return token
             else:
                 logger.error(f"Token não encontrado na resposta da EVS. Resposta: {data}")
                 return None
@@ -58,12 +68,11 @@ class EVSAPI:
             return None
 
     def rastrear_nf(self, CHAVENFE: str) -> dict | None:
-       
-        if not self.token:
-            logger.info("Token EVS não disponível. Tentando obter...")
-            if not self._get_token():
-                logger.error("Não foi possível obter o token EVS. Abortando rastreamento.")
-                return None
+        # Variável local: a mesma instância é usada por várias threads na varredura.
+        token = self._get_token()
+        if not token:
+            logger.error("Não foi possível obter o token EVS. Abortando rastreamento.")
+            return None
 
         encoded_user = quote_plus(self.user)
         encoded_senha = quote_plus(self.senha) 
@@ -77,21 +86,22 @@ class EVSAPI:
         
         headers = {
             "Content-Type": "application/json",
-            "Authorization": f"Bearer {self.token}"
+            "Authorization": f"Bearer {token}"
         }
 
+        response = None
         try:
             logger.info(f"Tentando rastrear NF {CHAVENFE} na EVS em: {full_url}")
-            response = requests.get(full_url, headers=headers)
+            response = transporte.get(full_url, circuito='EVS', headers=headers)
             response.raise_for_status() 
             data = response.json()
             
             return self._processar_dados_rastreamento(data)
         except requests.exceptions.RequestException as e:
             logger.error(f"Erro de requisição à API EVS para NF {CHAVENFE}: {e}")
-            if response.status_code == 401:
-                logging.warning("Token EVS expirado ou inválido. Tentando renovar...")
-                self.token = None
+            if response is not None and response.status_code == 401:
+                logging.warning("Token EVS expirado ou inválido. Será renovado na próxima consulta.")
+                tokens_transportadoras.invalidar('EVS', self._credenciais, token)
             return None
         except json.JSONDecodeError as e:
             logging.error(f"Erro ao decodificar JSON da API EVS para NF {CHAVENFE}: {e} - Resposta: {response.text}")
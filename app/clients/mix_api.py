@@ -5,6 +5,8 @@ from datetime import datetime
 from urllib.parse import urljoin 
 
 from config import Config
+from .token_cache import tokens_transportadoras
+from .transporte import transporte
 
 logger = logging.getLogger(__name__)
 
@@ -15,7 +17,15 @@ class MIXAPI:
         self.auth = Config.MIX_AUTH_BASE64
         self.token = None
 
+    @property
+    def _credenciais(self) -> tuple:
+        return (self.login_url, self.auth)
+
     def _get_token(self) -> str | None:
+        self.token = tokens_transportadoras.obter('MIX', self._credenciais, self._login)
+        return self.token
+
+    def _login(self) -> str | None:
 
         headers = {
             "Content-Type": "application/json",
@@ -29,7 +39,7 @@ class MIXAPI:
 
         try:
             logger.info(f"Tentando obter token da MIX em: {self.login_url}")
-            response = requests.post(self.login_url, headers=headers, data=json.dumps(payload))
+            response = transporte.post(self.login_url, circuito='MIX', headers=headers, data=json.dumps(payload))
             response.raise_for_status()
             data = response.json()
 
@@ -39,11 +49,9 @@ class MIXAPI:
                 token = token.get(key)
                 if token is None: break
 
-            self.token = token
-
-            if self.token:
+            if token:
                 logger.info("Token MIX obtido com sucesso.")
-                return self.token
+                return token
             else:
                 logger.error(f"Token não encontrado na resposta da MIX. Resposta: {data}")
                 return None
@@ -58,37 +66,38 @@ class MIXAPI:
             logger.error(f"Erro inesperado ao obter token da MIX: {e}")
             return None
 
-    def rastrear_nf(self, cte_number: str) -> dict | None:
-        if not self.token:
-            logger.info("Token MIX não disponível. Tentando obter...")
-            if not self._get_token():
-                logger.error("Não foi possível obter o token MIX. Abortando rastreamento.")
-                return None
+    def rastrear_nf(self, cte_number: str, _renovou_token: bool = False) -> dict | None:
+        # Variável local: a mesma instância é usada por várias threads na varredura.
+        token = self._get_token()
+        if not token:
+            logger.error("Não foi possível obter o token MIX. Abortando rastreamento.")
+            return None
 
         headers = {
             "Content-Type": "application/json", 
         }
 
         payload = {
-            "TokenWebService":"4650e988-881c-4c28-9c1d-b782e60cc066",
+            "TokenWebService": token,
             "TipoConsulta":2,
             "CNPJ":0,
-            "String":"31250212047164000153550010002405921190676623"
+            "String": cte_number
         }
         
+        response = None
         try:
             logger.info(f"Tentando rastrear CTe {cte_number} na MIX em: {self.tracking_url}")
-            response = requests.post(self.tracking_url, headers=headers, json=payload) 
+            response = transporte.post(self.tracking_url, circuito='MIX', headers=headers, json=payload)
             response.raise_for_status()
             data = response.json()
             
             return self._processar_dados_rastreamento(data)
         except requests.exceptions.RequestException as e:
             logger.error(f"Erro de requisição à API MIX para CTe {cte_number}: {e}")
-            if response.status_code == 401:
+            if response is not None and response.status_code == 401 and not _renovou_token:
                 logger.warning("Token MIX expirado ou inválido. Tentando renovar...")
-                self.token = None 
-                return self.rastrear_nf(cte_number)
+                tokens_transportadoras.invalidar('MIX', self._credenciais, token)
+                return self.rastrear_nf(cte_number, _renovou_token=True)
             return {"status": "Falha", "message": f"Erro de conexão/HTTP na MIX: {e}"}
         except json.JSONDecodeError as e:
             logger.error(f"Erro ao decodificar JSON da API MIX para CTe {cte_number}: {e} - Resposta: {response.text}")
@@ -0,0 +1,173 @@
+import threading
+import time
+import requests
+from config import Config
+
+CIRCUITO_FECHADO = 'FECHADO'
+CIRCUITO_ABERTO = 'ABERTO'
+CIRCUITO_MEIO_ABERTO = 'MEIO_ABERTO'
+
+
+class CircuitoAbertoError(requests.exceptions.RequestException):
+    def __init__(self, identificador: str):
+        super().__init__(f"Circuito da API {identificador} aberto: chamadas suspensas após falhas seguidas.")
+        self.identificador = identificador
+
+
+class LimitadorTaxa:
+    # Token bucket: 'rajada' chamadas de imediato e depois 'por_minuto' ao longo do minuto.
+    def __init__(self, por_minuto: int, rajada: int):
+        self._lock = threading.Lock()
+        self.configurar(por_minuto, rajada)
+        self._fichas = float(self.rajada)
+        self._atualizado_em = time.monotonic()
+
+    def configurar(self, por_minuto: int, rajada: int):
+        self.por_minuto = max(1, por_minuto)
+        self.rajada = max(1, rajada)
+
+    def _reabastecer(self, agora: float):
+        self._fichas = min(self.rajada, self._fichas + (agora - self._atualizado_em) * self.por_minuto / 60)
+        self._atualizado_em = agora
+
+    def consumir(self) -> bool:
+        with self._lock:
+            self._reabastecer(time.monotonic())
+            if self._fichas >= 1:
+                self._fichas -= 1
+                return True
+            return False
+
+    def espera(self) -> float:
+        with self._lock:
+            self._reabastecer(time.monotonic())
+            return max(0.0, (1 - self._fichas) * 60 / self.por_minuto)
+
+    @property
+    def fichas(self) -> float:
+        with self._lock:
+            self._reabastecer(time.monotonic())
+            return round(self._fichas, 2)
+
+
+class Disjuntor:
+    def __init__(self, limite_falhas: int, tempo_abertura: int):
+        self._lock = threading.Lock()
+        self.configurar(limite_falhas, tempo_abertura)
+        self._estado = CIRCUITO_FECHADO
+        self._falhas_consecutivas = 0
+        self._aberto_em = None
+        self.aberturas = 0
+        self.rejeitadas = 0
+
+    def configurar(self, limite_falhas: int, tempo_abertura: int):
+        self.limite_falhas = max(1, limite_falhas)
+        self.tempo_abertura = max(1, tempo_abertura)
+
+    @property
+    def estado(self) -> str:
+        with self._lock:
+            # Passado o tempo de abertura, deixa uma chamada de teste passar.
+            if self._estado == CIRCUITO_ABERTO and time.monotonic() - self._aberto_em >= self.tempo_abertura:
+                self._estado = CIRCUITO_MEIO_ABERTO
+            return self._estado
+
+    def permitir(self) -> bool:
+        if self.estado != CIRCUITO_ABERTO:
+            return True
+        with self._lock:
+            self.rejeitadas += 1
+        return False
+
+    def registrar_sucesso(self):
+        with self._lock:
+            self._estado = CIRCUITO_FECHADO
+            self._falhas_consecutivas = 0
+
+    def registrar_falha(self):
+        with self._lock:
+            self._falhas_consecutivas += 1
+            if self._estado == CIRCUITO_MEIO_ABERTO or self._falhas_consecutivas >= self.limite_falhas:
+                if self._estado != CIRCUITO_ABERTO:
+                    self.aberturas += 1
+                self._estado = CIRCUITO_ABERTO
+                self._aberto_em = time.monotonic()
+
+    def segundos_para_fechar(self) -> float | None:
+        with self._lock:
+            if self._estado != CIRCUITO_ABERTO:
+                return None
+            return max(0.0, round(self.tempo_abertura - (time.monotonic() - self._aberto_em), 1))
+
+    @property
+    def falhas_consecutivas(self) -> int:
+        return self._falhas_consecutivas
+
+
+class Circuito:
+    def __init__(self, identificador: str):
+        self.identificador = identificador
+        self.limitador = LimitadorTaxa(Config.PROTECAO_REQUISICOES_POR_MINUTO, Config.PROTECAO_RAJADA)
+        self.disjuntor = Disjuntor(Config.PROTECAO_LIMITE_FALHAS, Config.PROTECAO_TEMPO_ABERTURA_SEGUNDOS)
+
+    def to_dict(self) -> dict:
+        return {
+            'identificador': self.identificador,
+            'estado': self.disjuntor.estado,
+            'falhas_consecutivas': self.disjuntor.falhas_consecutivas,
+            'segundos_para_meio_aberto': self.disjuntor.segundos_para_fechar(),
+            'aberturas': self.disjuntor.aberturas,
+            'chamadas_rejeitadas': self.disjuntor.rejeitadas,
+            'limite_falhas': self.disjuntor.limite_falhas,
+            'tempo_abertura_segundos': self.disjuntor.tempo_abertura,
+            'requisicoes_por_minuto': self.limitador.por_minuto,
+            'rajada': self.limitador.rajada,
+            'fichas_disponiveis': self.limitador.fichas
+        }
+
+
+class ProtecaoTransportadoras:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._circuitos = {}
+
+    def circuito(self, identificador: str) -> Circuito:
+        identificador = identificador.upper()
+        circuito = self._circuitos.get(identificador)
+        if circuito is None:
+            with self._lock:
+                circuito = self._circuitos.setdefault(identificador, Circuito(identificador))
+        return circuito
+
+    def carregar_configuracao(self):
+        # Valores da tabela transportadora têm precedência sobre os padrões do Config.
+        # Várias linhas podem compartilhar o api_identifier; vale o limite mais restritivo.
+        from app.models.transportadora import Transportadora
+
+        configuracoes = {}
+        for identificador, por_minuto, limite_falhas, tempo_abertura in Transportadora.query.with_entities(
+            Transportadora.api_identifier, Transportadora.limite_requisicoes_por_minuto,
+            Transportadora.limite_falhas_circuito, Transportadora.tempo_abertura_circuito_segundos
+        ).filter(Transportadora.api_identifier.isnot(None)):
+            atual = configuracoes.setdefault(identificador.upper(), {})
+            for campo, valor in (('por_minuto', por_minuto), ('limite_falhas', limite_falhas), ('tempo_abertura', tempo_abertura)):
+                if valor is not None:
+                    atual[campo] = valor if campo not in atual else (
+                        max(atual[campo], valor) if campo == 'tempo_abertura' else min(atual[campo], valor)
+                    )
+
+        for identificador, valores in configuracoes.items():
+            circuito = self.circuito(identificador)
+            circuito.limitador.configurar(
+                valores.get('por_minuto', Config.PROTECAO_REQUISICOES_POR_MINUTO), Config.PROTECAO_RAJADA
+            )
+            circuito.disjuntor.configurar(
+                valores.get('limite_falhas', Config.PROTECAO_LIMITE_FALHAS),
+                valores.get('tempo_abertura', Config.PROTECAO_TEMPO_ABERTURA_SEGUNDOS)
+            )
+
+    def estatisticas(self) -> list[dict]:
+        return [circuito.to_dict() for circuito in sorted(self._circuitos.values(), key=lambda c: c.identificador)]
+
+
+protecao_transportadoras = ProtecaoTransportadoras()
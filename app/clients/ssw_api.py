@@ -5,6 +5,7 @@ from datetime import datetime
 from urllib.parse import urljoin 
 
 from config import Config
+from .transporte import transporte
 
 logger = logging.getLogger(__name__)
 
@@ -42,15 +43,16 @@ class SSWAPI:
             "Content-Type": "application/json"
         }
 
+        response = None
         try:
             logger.info(f"Tentando rastrear NF {num_nota} na SSW (CNPJ: {cnpj_filial}, usando credenciais AMPLA) em: {full_url}")
-            response = requests.post(full_url, headers=headers, data=json.dumps(payload), timeout=10)
+            response = transporte.post(full_url, circuito='SSW', headers=headers, data=json.dumps(payload))
             response.raise_for_status() 
             data = response.json()
             
             return self._processar_dados_rastreamento(data)
         except requests.exceptions.RequestException as e:
-            logger.error(f"Erro de requisição à API SSW para NF {num_nota} (CNPJ: {cnpj_filial}): {e} - Resposta: {response.text if response else 'N/A'}")
+            logger.error(f"Erro de requisição à API SSW para NF {num_nota} (CNPJ: {cnpj_filial}): {e} - Resposta: {response.text if response is not None else 'N/A'}")
             return {"status": "Falha", "message": f"Erro de conexão/HTTP na SSW: {e}"}
         except json.JSONDecodeError as e:
             logger.error(f"Erro ao decodificar JSON da API SSW para NF {num_nota} (CNPJ: {cnpj_filial}): {e} - Resposta: {response.text}")
@@ -0,0 +1,117 @@
+import hashlib
+import logging
+import threading
+import time
+import jwt
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+
+def _chave(transportadora: str, credenciais: tuple) -> tuple[str, str]:
+    # As credenciais entram só como hash, para não ficarem em memória nas chaves nem nas estatísticas.
+    bruto = '\x1f'.join('' if valor is None else str(valor) for valor in credenciais).encode('utf-8')
+    return transportadora, hashlib.sha256(bruto).hexdigest()[:16]
+
+
+def expiracao_jwt(token: str) -> float | None:
+    # Só lê o 'exp'; a assinatura é validada pela transportadora, não por nós.
+    try:
+        exp = jwt.decode(token, options={"verify_signature": False}).get('exp')
+    except jwt.PyJWTError:
+        return None
+    return float(exp) if exp else None
+
+
+class CacheTokens:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._tokens = {}
+        self._logins_em_andamento = {}
+        self._contadores = {'acertos': 0, 'logins': 0, 'falhas_login': 0, 'renovacoes_antecipadas': 0, 'invalidacoes': 0}
+
+    def _contar(self, campo: str):
+        with self._lock:
+            self._contadores[campo] += 1
+
+    def _lock_login(self, chave) -> threading.Lock:
+        with self._lock:
+            return self._logins_em_andamento.setdefault(chave, threading.Lock())
+
+    def obter(self, transportadora: str, credenciais: tuple, login, ttl: int | None = None) -> str | None:
+        chave = _chave(transportadora, credenciais)
+        agora = time.time()
+        atual = self._tokens.get(chave)
+
+        if atual and agora < atual['renovar_em']:
+            self._contar('acertos')
+            return atual['token']
+
+        lock_login = self._lock_login(chave)
+        if atual and agora < atual['expira_em']:
+            # Perto de expirar: só uma thread renova; as outras seguem com o token atual.
+            if not lock_login.acquire(blocking=False):
+                self._contar('acertos')
+                return atual['token']
+            self._contar('renovacoes_antecipadas')
+        else:
+            # Sem token válido: quem chegar depois espera o login em andamento.
+            lock_login.acquire()
+
+        try:
+            atual = self._tokens.get(chave)
+            if atual and time.time() < atual['renovar_em']:
+                self._contar('acertos')
+                return atual['token']
+
+            token = login()
+            if not token:
+                self._contar('falhas_login')
+                if atual and time.time() < atual['expira_em']:
+                    return atual['token']
+                return None
+
+            self._contar('logins')
+            self._guardar(chave, token, ttl)
+            return token
+        finally:
+            lock_login.release()
+
+    def _guardar(self, chave, token: str, ttl: int | None):
+        agora = time.time()
+        expira_em = expiracao_jwt(token) or agora + (ttl or Config.TOKEN_TTL_PADRAO_SEGUNDOS)
+        margem = min(Config.TOKEN_MARGEM_RENOVACAO_SEGUNDOS, (expira_em - agora) / 2)
+        self._tokens[chave] = {
+            'token': token,
+            'obtido_em': agora,
+            'expira_em': expira_em,
+            'renovar_em': expira_em - margem
+        }
+
+    def invalidar(self, transportadora: str, credenciais: tuple, token: str | None = None):
+        chave = _chave(transportadora, credenciais)
+        with self._lock:
+            atual = self._tokens.get(chave)
+            # Só descarta se for o mesmo token recusado; outra thread pode já ter renovado.
+            if atual and (token is None or atual['token'] == token):
+                del self._tokens[chave]
+                self._contadores['invalidacoes'] += 1
+                logger.warning(f"Token da API {transportadora} invalidado.")
+
+    def estatisticas(self) -> dict:
+        agora = time.time()
+        return {
+            **self._contadores,
+            'tokens': [
+                {
+                    'transportadora': transportadora,
+                    'credencial': credencial,
+                    'expira_em_segundos': round(dados['expira_em'] - agora),
+                    'idade_segundos': round(agora - dados['obtido_em'])
+                }
+                for (transportadora, credencial), dados in list(self._tokens.items())
+            ]
+        }
+
+
+tokens_transportadoras = CacheTokens()
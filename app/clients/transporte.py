@@ -0,0 +1,139 @@
+import threading
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import MaxRetryError, ResponseError
+from urllib3.util.retry import Retry
+from config import Config
+from .protecao import CircuitoAbertoError, protecao_transportadoras
+
+# 429 e erros de gateway/indisponibilidade costumam ser passageiros nas APIs das transportadoras.
+STATUS_RETENTATIVA = (429, 500, 502, 503, 504)
+
+
+class RetryLimitado(Retry):
+    # O urllib3 dorme o Retry-After inteiro, sem teto, na thread que fez a chamada.
+    # Acima do máximo (ex.: bloqueio "até amanhã") a resposta volta na hora, e o
+    # limitador/circuito da transportadora cuida do resto.
+    def increment(self, method=None, url=None, response=None, error=None, _pool=None, _stacktrace=None):
+        if response is not None:
+            retry_after = super().get_retry_after(response)
+            if retry_after is not None and retry_after > Config.TRANSPORTE_RETRY_AFTER_MAXIMO_SEGUNDOS:
+                raise MaxRetryError(_pool, url, ResponseError(f"Retry-After de {retry_after:.0f}s acima do máximo"))
+        return super().increment(method, url, response, error, _pool, _stacktrace)
+
+    def get_retry_after(self, response) -> float | None:
+        retry_after = super().get_retry_after(response)
+        if retry_after is None:
+            return None
+        return min(retry_after, Config.TRANSPORTE_RETRY_AFTER_MAXIMO_SEGUNDOS)
+
+
+class TransporteHTTP:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._sessoes = {}
+        self._contadores = {}
+
+    def _criar_sessao(self) -> requests.Session:
+        retry = RetryLimitado(
+            total=Config.TRANSPORTE_RETENTATIVAS,
+            # Timeout de leitura já custou TRANSPORTE_TIMEOUT_LEITURA; repetir mais de uma vez
+            # multiplicaria o tempo de cada chamada.
+            read=Config.TRANSPORTE_RETENTATIVAS_LEITURA,
+            backoff_factor=Config.TRANSPORTE_BACKOFF_SEGUNDOS,
+            status_forcelist=STATUS_RETENTATIVA,
+            # As chamadas às transportadoras (inclusive os POSTs de login e consulta) não
+            # alteram nada do lado delas, então podem ser repetidas com segurança.
+            allowed_methods=None,
+            respect_retry_after_header=True,
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(
+            pool_connections=Config.TRANSPORTE_POOL_CONEXOES,
+            pool_maxsize=Config.TRANSPORTE_POOL_MAXIMO,
+            max_retries=retry
+        )
+        sessao = requests.Session()
+        sessao.mount('https://', adapter)
+        sessao.mount('http://', adapter)
+        return sessao
+
+    def sessao(self, url: str) -> tuple[str, requests.Session]:
+        host = urlsplit(url).netloc
+        sessao = self._sessoes.get(host)
+        if sessao is None:
+            with self._lock:
+                sessao = self._sessoes.get(host)
+                if sessao is None:
+                    sessao = self._sessoes[host] = self._criar_sessao()
+                    self._contadores[host] = {'requisicoes': 0, 'erros': 0, 'retentativas': 0}
+        return host, sessao
+
+    def _contar(self, host: str, campo: str, quantidade: int = 1):
+        with self._lock:
+            self._contadores[host][campo] += quantidade
+
+    def requisitar(self, metodo: str, url: str, circuito: str | None = None, **kwargs) -> requests.Response:
+        # 'circuito' é o api_identifier da transportadora: com o circuito aberto a chamada
+        # falha na hora, sem esperar o timeout de uma API que já está fora do ar.
+        disjuntor = protecao_transportadoras.circuito(circuito).disjuntor if circuito else None
+        if disjuntor and not disjuntor.permitir():
+            raise CircuitoAbertoError(circuito)
+
+        host, sessao = self.sessao(url)
+        kwargs.setdefault('timeout', (Config.TRANSPORTE_TIMEOUT_CONEXAO, Config.TRANSPORTE_TIMEOUT_LEITURA))
+        self._contar(host, 'requisicoes')
+        try:
+            response = sessao.request(metodo, url, **kwargs)
+        except requests.exceptions.RequestException:
+            self._contar(host, 'erros')
+            if disjuntor:
+                disjuntor.registrar_falha()
+            raise
+
+        retries = getattr(response.raw, 'retries', None)
+        if retries is not None and retries.history:
+            self._contar(host, 'retentativas', len(retries.history))
+        if disjuntor:
+            # 4xx (nota não encontrada, token recusado) é resposta da API funcionando.
+            if response.status_code in STATUS_RETENTATIVA:
+                disjuntor.registrar_falha()
+            else:
+                disjuntor.registrar_sucesso()
+        return response
+
+    def get(self, url: str, circuito: str | None = None, **kwargs) -> requests.Response:
+        return self.requisitar('GET', url, circuito, **kwargs)
+
+    def post(self, url: str, circuito: str | None = None, **kwargs) -> requests.Response:
+        return self.requisitar('POST', url, circuito, **kwargs)
+
+    def estatisticas(self) -> dict:
+        hosts = {}
+        for host, sessao in list(self._sessoes.items()):
+            # O urllib3 conta conexões abertas e requisições por pool; a diferença é o reaproveitamento.
+            conexoes_abertas = 0
+            requisicoes_pool = 0
+            adapter = sessao.get_adapter('https://')
+            for chave in list(adapter.poolmanager.pools.keys()):
+                pool = adapter.poolmanager.pools.get(chave)
+                if pool is None:
+                    continue
+                conexoes_abertas += pool.num_connections
+                requisicoes_pool += pool.num_requests
+            hosts[host] = {
+                **self._contadores[host],
+                'conexoes_abertas': conexoes_abertas,
+                'conexoes_reaproveitadas': max(0, requisicoes_pool - conexoes_abertas),
+                'taxa_reaproveitamento': round(1 - conexoes_abertas / requisicoes_pool, 4) if requisicoes_pool else None
+            }
+        return {
+            'pool_maximo_por_host': Config.TRANSPORTE_POOL_MAXIMO,
+            'timeout_conexao': Config.TRANSPORTE_TIMEOUT_CONEXAO,
+            'timeout_leitura': Config.TRANSPORTE_TIMEOUT_LEITURA,
+            'hosts': hosts
+        }
+
+
+transporte = TransporteHTTP()
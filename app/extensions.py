@@ -3,7 +3,9 @@ from flask_migrate import Migrate
 from flask_cors import CORS
 from flask_jwt_extended import JWTManager
 from apscheduler.schedulers.background import BackgroundScheduler
+from concurrent.futures import ThreadPoolExecutor
 from sqlalchemy import MetaData
+from config import Config
 
 naming_convention = {
     "ix": "ix_%(column_0_label)s",
@@ -17,4 +19,6 @@ db = SQLAlchemy(metadata=MetaData(naming_convention=naming_convention))
 migrate = Migrate()
 cors = CORS()
 jwt = JWTManager()
-scheduler = BackgroundScheduler(daemon=True)
\ No newline at end of file
+scheduler = BackgroundScheduler(daemon=True)
+importacao_executor = ThreadPoolExecutor(max_workers=Config.IMPORTACAO_WORKERS, thread_name_prefix='importacao')
+rastreamento_executor = ThreadPoolExecutor(max_workers=Config.RASTREAMENTO_WORKERS, thread_name_prefix='rastreamento')
\ No newline at end of file
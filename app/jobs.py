@@ -1,97 +1,192 @@
-from datetime import datetime, date
+import os
+import threading
+from datetime import datetime, date, timedelta
 from flask import Flask
 from config import Config
-from app.extensions import db
-from .models import Entrega, Rastreamento
-
-from .clients.acette_api import AcetteAPI
-from .clients.evs_api import EVSAPI
-from .clients.mix_api import MIXAPI
-from .clients.ssw_api import SSWAPI
-
-API_CLIENTS = {
-    'ACETTE': AcetteAPI,
-    'EVS': EVSAPI,
-    'MIX': MIXAPI,
-    'SSW': SSWAPI
- 
-}
+from sqlalchemy import func, update
+from app.extensions import db, importacao_executor
+from .models import Entrega, Rastreamento, Importacao, Exclusao
+from .utils.importacao import importar_arquivo
+from .utils.indicadores import materializar_em_aberto
+from .utils.metricas import atualizar_metricas
+from .utils.motor_rastreamento import MotorRastreamento
 
 def tarefa_rastreamento_especifico(app: Flask, entrega_id: int):
     with app.app_context():
         print(f"Executando rastreamento agendado para a entrega ID: {entrega_id}")
-        entrega = db.session.get(Entrega, entrega_id)
+        resultado = MotorRastreamento().executar(Entrega.id == entrega_id)
 
-        if not entrega or entrega.DATAFINALIZACAO:
+        if not resultado['total']:
             print(f"Entrega {entrega_id} já finalizada ou não encontrada. Cancelando rastreamento.")
-            return
+        elif resultado['sem_cliente']:
+            print(f"Nenhum cliente de API encontrado para a entrega {entrega_id}. Pulando.")
+        elif resultado['adiadas']:
+            print(f"API da transportadora da entrega {entrega_id} com circuito aberto. Rastreamento adiado.")
+        elif resultado['rastreadas']:
+            print(f"Rastreamento da entrega {entrega_id} atualizado com sucesso.")
+        return resultado
 
-        identifier = entrega.transportadora.api_identifier if entrega.transportadora else None
-        ApiClientClass = API_CLIENTS.get(identifier)
+# Importações na fila ou em execução neste processo; só elas têm o sinal de vida renovado.
+_importacoes_deste_processo = set()
+_lock_importacoes = threading.Lock()
 
-        if not ApiClientClass:
-            print(f"Nenhum cliente de API encontrado para a entrega {entrega_id}. Pulando.")
-            return
+def agendar_importacao(app: Flask, importacao_id: int):
+    with _lock_importacoes:
+        _importacoes_deste_processo.add(importacao_id)
+    importacao_executor.submit(tarefa_importacao_entregas, app, importacao_id)
 
+def tarefa_recuperar_importacoes(app: Flask):
+    # O executor roda dentro do processo: se o servidor reinicia no meio de uma importação,
+    # a linha ficaria PENDENTE/PROCESSANDO para sempre e o arquivo enviado nunca seria removido.
+    with app.app_context():
         try:
-            api_client = ApiClientClass()
-            dados_padronizados = api_client.rastrear_nf(entrega.CHAVENFE)
- 
-            if identifier == 'SSW':
-                cnpj_filial = Config.FILIAL_CNPJ_MAP.get(entrega.CODFILIAL)
-                tipo_servico = entrega.transportadora.api_config_key
-
-                if not cnpj_filial or not tipo_servico:
-                    print(f"CNPJ da filial ou tipo de serviço SSW não configurado para entrega {entrega.id}")
-                    return
-
-                dados_padronizados = api_client.rastrear_nf(
-                    num_nota=entrega.NUMNOTA,
-                    cnpj_filial=cnpj_filial,
-                    tipo_ssw_servico=tipo_servico
+            with _lock_importacoes:
+                ativas = list(_importacoes_deste_processo)
+            if ativas:
+                db.session.execute(
+                    update(Importacao)
+                    .where(Importacao.id.in_(ativas), Importacao.status.in_(('PENDENTE', 'PROCESSANDO')))
+                    .values(data_atualizacao=datetime.utcnow())
                 )
-            else:
-                dados_padronizados = api_client.rastrear_nf(chave_nfe=entrega.CHAVENFE)
-
-            if dados_padronizados and dados_padronizados.get("eventos"):
-                Rastreamento.query.filter_by(entrega_id=entrega_id).delete()
-                for evento in dados_padronizados["eventos"]:
-                    novo_evento = Rastreamento(
-                        entrega_id=entrega_id,
-                        timestamp=evento.get("data_hora_iso"),
-                        status_descricao=evento.get("descricao"),
-                        localizacao=evento.get("cidade")
-                    )
-                    db.session.add(novo_evento)
-                
-                entrega.status = dados_padronizados.get("status", entrega.status)
                 db.session.commit()
-                print(f"Rastreamento da entrega {entrega_id} atualizado com sucesso.")
+
+            limite = datetime.utcnow() - timedelta(minutes=app.config['IMPORTACAO_TEMPO_ORFA_MINUTOS'])
+            orfas = Importacao.query.filter(
+                Importacao.status.in_(('PENDENTE', 'PROCESSANDO')),
+                func.coalesce(Importacao.data_atualizacao, Importacao.data_criacao) < limite
+            ).all()
+            for importacao in orfas:
+                importacao.status = 'FALHOU'
+                importacao.mensagem = "Importação interrompida pelo reinício do servidor. Envie o arquivo novamente."
+                if importacao.lotes_processados:
+                    importacao.mensagem += f" Os {importacao.lotes_processados} lotes anteriores à interrupção já foram salvos."
+                importacao.data_fim = datetime.utcnow()
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            print(f"Erro ao recuperar importações interrompidas: {e}")
+            return
+
+        for importacao in orfas:
+            print(f"Importação {importacao.id} interrompida marcada como falha.")
+            try:
+                os.remove(importacao.caminho_arquivo)
+            except OSError:
+                pass
+
+def tarefa_importacao_entregas(app: Flask, importacao_id: int):
+    try:
+        _executar_importacao(app, importacao_id)
+    finally:
+        with _lock_importacoes:
+            _importacoes_deste_processo.discard(importacao_id)
+
+def _executar_importacao(app: Flask, importacao_id: int):
+    with app.app_context():
+        importacao = db.session.get(Importacao, importacao_id)
+        if not importacao:
+            print(f"Importação {importacao_id} não encontrada. Cancelando processamento.")
+            return
+
+        importacao.status = 'PROCESSANDO'
+        importacao.data_inicio = datetime.utcnow()
+        db.session.commit()
+
+        max_erros = app.config['IMPORTACAO_MAX_ERROS_REPORTADOS']
+        try:
+            importar_arquivo(
+                importacao.caminho_arquivo,
+                importacao.nome_arquivo,
+                streaming=importacao.streaming,
+                atualizar=importacao.atualizar_existentes,
+                ao_concluir_lote=lambda resultado_lote, erros_lote: importacao.registrar_lote(resultado_lote, erros_lote, max_erros)
+            )
+            importacao.status = 'CONCLUIDA'
+            importacao.mensagem = (
+                f"{importacao.linhas_processadas} linhas processadas: {importacao.inseridas} entregas novas salvas, "
+                f"{importacao.atualizadas} atualizadas, {importacao.ignoradas} ignoradas e {importacao.rejeitadas} rejeitadas."
+            )
+        except Exception as e:
+            db.session.rollback()
+            print(f"Erro ao processar a importação {importacao_id}: {e}")
+            importacao = db.session.get(Importacao, importacao_id)
+            importacao.status = 'FALHOU'
+            importacao.mensagem = f"Erro ao processar o arquivo: {str(e)}"
+            if importacao.lotes_processados:
+                importacao.mensagem += f" Os {importacao.lotes_processados} lotes anteriores ao erro já foram salvos."
+        finally:
+            importacao.data_fim = datetime.utcnow()
+            db.session.commit()
+            try:
+                os.remove(importacao.caminho_arquivo)
+            except OSError:
+                pass
+
+def tarefa_materializar_indicadores(app: Flask):
+    with app.app_context():
+        print(f"[{date.today()}] Atualizando status, dias de atraso e prazo médio das entregas em aberto...")
+        try:
+            resultado = materializar_em_aberto()
+            db.session.commit()
+            print(f"{resultado['avaliadas']} entregas avaliadas, {resultado['atualizadas']} atualizadas.")
         except Exception as e:
-            print(f"Erro ao processar a API para a entrega {entrega_id}: {e}")
+            db.session.rollback()
+            print(f"Erro ao atualizar indicadores das entregas: {e}")
 
-def tarefa_de_verificacao_diaria(app: Flask, scheduler):
+def tarefa_limpar_exclusoes(app: Flask):
+    with app.app_context():
+        limite = datetime.utcnow() - timedelta(days=app.config['EXCLUSOES_RETENCAO_DIAS'])
+        try:
+            removidas = Exclusao.query.filter(Exclusao.data_exclusao < limite).delete(synchronize_session=False)
+            db.session.commit()
+            if removidas:
+                print(f"{removidas} registros de exclusão anteriores a {limite:%Y-%m-%d} removidos.")
+        except Exception as e:
+            db.session.rollback()
+            print(f"Erro ao limpar registros de exclusão: {e}")
+
+# A atualização incremental e a reconstrução apagam e regravam os mesmos dias;
+# não podem rodar ao mesmo tempo.
+_lock_metricas = threading.Lock()
+
+def tarefa_atualizar_metricas(app: Flask, reconstruir: bool = False):
+    with app.app_context(), _lock_metricas:
+        try:
+            resultado = atualizar_metricas(reconstruir=reconstruir)
+            db.session.commit()
+            if reconstruir:
+                print(f"Métricas de entregas reconstruídas: {resultado['dias_recalculados']} dias recalculados.")
+            elif resultado['dias_recalculados']:
+                print(f"Métricas de entregas atualizadas: {resultado['dias_recalculados']} dias recalculados.")
+        except Exception as e:
+            db.session.rollback()
+            print(f"Erro ao atualizar métricas de entregas: {e}")
+
+def tarefa_varredura_rastreamento(app: Flask):
     with app.app_context():
-        from .models import Entrega, Rastreamento
-        from . import scheduler
-        
         hoje = date.today()
-        print(f"[{hoje}] Procurando por entregas com previsão para hoje...")
-
-        entregas_para_hoje_ou_atrasadas = Entrega.query.filter(
-            db.func.date(Entrega.PREVISAOENTREGA) <= hoje,
-            Entrega.DATAFINALIZACAO.is_(None)
-        ).all()
-        
-        print(f"Encontradas {len(entregas_para_hoje_ou_atrasadas)} entregas para agendar rastreamento hoje.")
-
-        for entrega in entregas_para_hoje_ou_atrasadas:
-            print(f"Agendando rastreamentos para a entrega ID: {entrega.id} às 11:30, 16:00 e 17:30.")
-            job_id_base = f"entrega_{entrega.id}"
-            if scheduler.get_job(f"{job_id_base}_1130"): scheduler.remove_job(f"{job_id_base}_1130")
-            if scheduler.get_job(f"{job_id_base}_1600"): scheduler.remove_job(f"{job_id_base}_1600")
-            if scheduler.get_job(f"{job_id_base}_1730"): scheduler.remove_job(f"{job_id_base}_1730")
-            
-            scheduler.add_job(tarefa_rastreamento_especifico, 'cron', hour=11, minute=30, args=[app, entrega.id], id=f"{job_id_base}_1130")
-            scheduler.add_job(tarefa_rastreamento_especifico, 'cron', hour=16, minute=0, args=[app, entrega.id], id=f"{job_id_base}_1600")
-            scheduler.add_job(tarefa_rastreamento_especifico, 'cron', hour=17, minute=30, args=[app, entrega.id], id=f"{job_id_base}_1730")
\ No newline at end of file
+        motor = MotorRastreamento()
+        # Uma consulta pelo índice parcial de PREVISAOENTREGA das entregas em aberto.
+        alvos = motor.carregar_alvos(
+            Entrega.PREVISAOENTREGA < datetime.combine(hoje + timedelta(days=1), datetime.min.time())
+        )
+        print(f"[{datetime.now():%Y-%m-%d %H:%M}] Varredura de rastreamento: {len(alvos)} entregas com previsão até hoje.")
+
+        tamanho = app.config['RASTREAMENTO_TAMANHO_VARREDURA']
+        totais = {}
+        for inicio in range(0, len(alvos), tamanho):
+            try:
+                resultado = motor.processar(alvos[inicio:inicio + tamanho])
+            except Exception as e:
+                db.session.rollback()
+                print(f"Erro ao processar o bloco {inicio // tamanho + 1} da varredura de rastreamento: {e}")
+                continue
+            for chave, valor in resultado.items():
+                totais[chave] = totais.get(chave, 0) + valor
+
+        print(
+            f"Varredura de rastreamento concluída: {totais.get('rastreadas', 0)} rastreadas, "
+            f"{totais.get('sem_eventos', 0)} sem eventos, {totais.get('falhas', 0)} falhas, "
+            f"{totais.get('sem_cliente', 0)} sem cliente de API, {totais.get('adiadas', 0)} adiadas por circuito aberto em {totais.get('duracao_segundos', 0):.0f}s."
+        )
+        return totais
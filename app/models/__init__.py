@@ -1,6 +1,10 @@
 from .comprovante import Comprovante
 from .devolucao import Devolucao
 from .entrega import Entrega
+from .exclusao import Exclusao
+from .feriado import Feriado
+from .importacao import Importacao
+from .metrica import MetricaEntregaDiaria, ControleMetricas
 from .motorista import Motorista
 from .rastreamento import Rastreamento
 from .transportadora import Transportadora
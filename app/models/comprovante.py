@@ -1,15 +1,21 @@
 from app.extensions import db
+from app.models.exclusao import registrar_exclusoes
 from datetime import datetime, date
 
+@registrar_exclusoes
 class Comprovante(db.Model):
     __tablename__ = 'comprovantes'
+    __table_args__ = (
+        db.Index('ix_comprovantes_data_atualizacao_id', 'data_atualizacao', 'id'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
-    entrega_id = db.Column(db.Integer, db.ForeignKey('entregas.id'), nullable=False)
+    entrega_id = db.Column(db.Integer, db.ForeignKey('entregas.id'), nullable=False, index=True)
     motorista_id = db.Column(db.Integer, db.ForeignKey('motoristas.id'), nullable=False)
     tipo = db.Column(db.String(50), nullable=False)
     caminho_arquivo = db.Column(db.String(255), nullable=False)
     data_envio = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    data_atualizacao = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
 
     entrega = db.relationship('Entrega', back_populates='comprovantes')
     motorista = db.relationship('Motorista',  back_populates='comprovantes')
@@ -21,7 +27,8 @@ class Comprovante(db.Model):
             'motorista_id': self.motorista_id,
             'tipo': self.tipo,
             'caminho_arquivo': self.caminho_arquivo,
-            'data_envio': self.data_envio.strftime('%d/%m/%Y %H:%M:%S') if self.data_envio else None
+            'data_envio': self.data_envio.strftime('%d/%m/%Y %H:%M:%S') if self.data_envio else None,
+            'data_atualizacao': self.data_atualizacao.isoformat() if self.data_atualizacao else None
         }
     
     def __repr__(self):
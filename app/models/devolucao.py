@@ -1,11 +1,16 @@
 from app.extensions import db
+from app.models.exclusao import registrar_exclusoes
 from datetime import datetime, date
 
+@registrar_exclusoes
 class Devolucao(db.Model):
     __tablename__ = 'devolucoes'
+    __table_args__ = (
+        db.Index('ix_devolucoes_data_atualizacao_id', 'data_atualizacao', 'id'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
-    entrega_id = db.Column(db.Integer, db.ForeignKey('entregas.id'), nullable=False)
+    entrega_id = db.Column(db.Integer, db.ForeignKey('entregas.id'), nullable=False, index=True)
     motorista_id = db.Column(db.Integer, db.ForeignKey('motoristas.id'), nullable=False)
  
     tipo_devolucao = db.Column(db.String(20), nullable=True)
@@ -1,8 +1,10 @@
 from app.extensions import db
-from datetime import datetime, date, timedelta
+from datetime import datetime, date, time, timedelta
 from sqlalchemy.dialects.postgresql import ENUM
-from sqlalchemy import ForeignKey
-from workalendar.america import Brazil
+from sqlalchemy import ForeignKey, and_, case, event, func, inspect, or_
+from sqlalchemy.ext.hybrid import hybrid_property
+from app.utils.calendario import calendario, calcular_previsao_entrega
+from app.models.exclusao import registrar_exclusoes
 
 ENTREGAS_STATUS = (
     'ENTREGA_PENDENTE',
@@ -12,6 +14,23 @@ ENTREGAS_STATUS = (
     'DEVOLUCAO_TOTAL',
 )
 
+STATUS_SAIDA_PENDENTE = 'Saida do CD Pendente'
+STATUS_CONCLUIDA_NO_PRAZO = 'Entrega Concluída - No prazo'
+STATUS_CONCLUIDA_FORA_DO_PRAZO = 'Entrega Concluída - Fora do prazo'
+STATUS_PENDENTE_NO_PRAZO = 'Entrega Pendente - No prazo'
+STATUS_PENDENTE_FORA_DO_PRAZO = 'Entrega Pendente - Fora do prazo'
+
+SITUACOES_PRAZO = {
+    'pendente_no_prazo': STATUS_PENDENTE_NO_PRAZO,
+    'pendente_fora_do_prazo': STATUS_PENDENTE_FORA_DO_PRAZO,
+    'concluida_no_prazo': STATUS_CONCLUIDA_NO_PRAZO,
+    'concluida_fora_do_prazo': STATUS_CONCLUIDA_FORA_DO_PRAZO,
+}
+
+# Campos que alteram STATUSPRAZO, DIASATRASO e PRAZOMEDIO.
+CAMPOS_INDICADORES = ('DTCARREGAMENTO', 'PREVISAOENTREGA', 'AGENDAMENTO', 'DATAFINALIZACAO', 'UF', 'MUNICIPIO')
+
+@registrar_exclusoes
 class Entrega(db.Model):
     __tablename__ = 'entregas'
 
@@ -19,9 +38,9 @@ class Entrega(db.Model):
     CODFILIAL = db.Column(db.Integer, nullable=False)
     DTFAT = db.Column(db.DateTime, nullable=False)
     DTCARREGAMENTO = db.Column(db.DateTime, nullable=False)
-    ROMANEIO = db.Column(db.Integer, nullable=False)
+    ROMANEIO = db.Column(db.Integer, nullable=False, index=True)
     TIPOVENDA = db.Column(db.Integer, nullable=False)
-    NUMNOTA = db.Column(db.Integer, nullable=False)
+    NUMNOTA = db.Column(db.Integer, nullable=False, index=True)
     NUMPED = db.Column(db.Integer, nullable=False)
     CODCLI = db.Column(db.Integer, nullable=False)
     CLIENTE = db.Column(db.String(200), nullable=False)
@@ -31,16 +50,17 @@ class Entrega(db.Model):
     TELCOM = db.Column(db.String(20), nullable=True)
     EMAIL_1 = db.Column(db.String(100), nullable=True)
     VENDEDOR = db.Column(db.String(100), nullable=True)
-    transportadora_cod = db.Column("CODFORNECFRETE", db.Integer, ForeignKey('transportadora.codfornecfrete'))
+    transportadora_cod = db.Column("CODFORNECFRETE", db.Integer, ForeignKey('transportadora.codfornecfrete'), index=True)
     TRANSPORTADORA = db.Column(db.String(200), nullable=False)
     VLTOTAL = db.Column(db.Float(10, 2), nullable=False)
     NUMVOLUME = db.Column(db.Integer, nullable=False)
     TOTPESO = db.Column(db.Float(10, 2), nullable=False)
     PRAZOENTREGA = db.Column(db.Integer, nullable=False)
-    CHAVENFE = db.Column(db.String(44), nullable=False)
+    CHAVENFE = db.Column(db.String(44), nullable=False, unique=True, index=True)
     PREVISAOENTREGA = db.Column(db.DateTime, nullable=True)
     DATAFINALIZACAO = db.Column(db.DateTime, nullable=True)
-    STATUS = db.Column(ENUM(*ENTREGAS_STATUS, name='entregas_status_enum', create_type=False), default='ENTREGA_PENDENTE', nullable=False)
+    STATUS = db.Column(ENUM(*ENTREGAS_STATUS, name='entregas_status_enum', create_type=False), default='ENTREGA_PENDENTE', nullable=False, index=True)
+    STATUSPRAZO = db.Column(db.String(50), nullable=True)
     DIASATRASO = db.Column(db.Integer, nullable=True)
     PRAZOMEDIO = db.Column(db.Integer, nullable=True)
     AGENDAMENTO = db.Column(db.DateTime, nullable=True)
@@ -60,6 +80,45 @@ class Entrega(db.Model):
     devolucoes = db.relationship('Devolucao', back_populates='entrega', cascade="all, delete-orphan")
     rastreamentos = db.relationship('Rastreamento', back_populates='entrega', lazy='dynamic')
 
+    @hybrid_property
+    def data_limite(self):
+        return self.AGENDAMENTO if self.AGENDAMENTO else self.PREVISAOENTREGA
+
+    @data_limite.expression
+    def data_limite(cls):
+        return func.coalesce(cls.AGENDAMENTO, cls.PREVISAOENTREGA)
+
+    @hybrid_property
+    def situacao_prazo(self):
+        return self.calcular_status()
+
+    @situacao_prazo.expression
+    def situacao_prazo(cls):
+        return case(
+            (cls.DTCARREGAMENTO.is_(None), STATUS_SAIDA_PENDENTE),
+            (cls.DATAFINALIZACAO.isnot(None), case(
+                (func.date(cls.DATAFINALIZACAO) <= func.date(cls.data_limite), STATUS_CONCLUIDA_NO_PRAZO),
+                else_=STATUS_CONCLUIDA_FORA_DO_PRAZO
+            )),
+            (func.date(cls.data_limite) >= func.current_date(), STATUS_PENDENTE_NO_PRAZO),
+            else_=STATUS_PENDENTE_FORA_DO_PRAZO
+        )
+
+    @classmethod
+    def filtro_situacao(cls, situacao: str, hoje: date = None):
+        # Equivalente a situacao_prazo == situacao, mas comparando as colunas com o
+        # início do dia para que ix_entregas_data_limite_abertas possa ser usado.
+        inicio_hoje = datetime.combine(hoje or date.today(), time.min)
+        abertas = and_(cls.DTCARREGAMENTO.isnot(None), cls.DATAFINALIZACAO.is_(None))
+
+        if situacao == 'pendente_no_prazo':
+            return and_(abertas, cls.data_limite >= inicio_hoje)
+        if situacao == 'pendente_fora_do_prazo':
+            return and_(abertas, or_(cls.data_limite.is_(None), cls.data_limite < inicio_hoje))
+        if situacao in SITUACOES_PRAZO:
+            return cls.situacao_prazo == SITUACOES_PRAZO[situacao]
+        raise ValueError(f"Situação inválida. Situações permitidas: {', '.join(SITUACOES_PRAZO)}.")
+
     def _get_working_days_between(self, start_dt: datetime, end_dt: datetime, feriados_customizados: list[date] = None) -> int:
         if not start_dt or not end_dt:
             return 0
@@ -67,30 +126,30 @@ class Entrega(db.Model):
         end_date_only = end_dt.date()
         if end_date_only < start_date_only:
             return 0
-        cal = Brazil()
 
-        return cal.get_working_days_delta(start_date_only, end_date_only)
+        return calendario.working_days_between(start_date_only, end_date_only, feriados_customizados, self.UF, self.MUNICIPIO)
     
     def definir_previsao_entrega(self):
          if self.DTCARREGAMENTO and self.PRAZOENTREGA:
-            cal = Brazil()
-            self.PREVISAOENTREGA = cal.add_working_days(self.DTCARREGAMENTO.date(), self.PRAZOENTREGA)
+            self.PREVISAOENTREGA = calcular_previsao_entrega(
+                self.DTCARREGAMENTO, self.PRAZOENTREGA, uf=self.UF, municipio=self.MUNICIPIO
+            )
 
     def calcular_status(self, feriados_customizados: list[date] = None):
         if not self.DTCARREGAMENTO:
-            return 'Saida do CD Pendente'
+            return STATUS_SAIDA_PENDENTE
         elif self.DATAFINALIZACAO:
-            data_comparacao_prazo = self.AGENDAMENTO if self.AGENDAMENTO else self.PREVISAOENTREGA
+            data_comparacao_prazo = self.data_limite
             if data_comparacao_prazo and self.DATAFINALIZACAO.date() <= data_comparacao_prazo.date():
-                return 'Entrega Concluída - No prazo'
+                return STATUS_CONCLUIDA_NO_PRAZO
             else:
-                return 'Entrega Concluída - Fora do prazo'
+                return STATUS_CONCLUIDA_FORA_DO_PRAZO
         else: 
-            data_comparacao_prazo = self.AGENDAMENTO if self.AGENDAMENTO else self.PREVISAOENTREGA
+            data_comparacao_prazo = self.data_limite
             if data_comparacao_prazo and data_comparacao_prazo.date() >= datetime.now().date():
-                return 'Entrega Pendente - No prazo'
+                return STATUS_PENDENTE_NO_PRAZO
             else:
-                return 'Entrega Pendente - Fora do prazo'
+                return STATUS_PENDENTE_FORA_DO_PRAZO
     
     def calcular_dias_atraso(self, feriados_customizados: list[date] = None):
         today = datetime.now()
@@ -114,6 +173,11 @@ class Entrega(db.Model):
         prazo_medio = self._get_working_days_between(self.DTCARREGAMENTO, data_final, feriados_customizados)
         return prazo_medio
     
+    def atualizar_indicadores(self):
+        self.STATUSPRAZO = self.calcular_status()
+        self.DIASATRASO = self.calcular_dias_atraso()
+        self.PRAZOMEDIO = self.calcular_prazo_medio()
+
     def to_dict(self, feriados_customizados: list[date] = None):
         data = {
             'id': self.id,
@@ -147,14 +211,15 @@ class Entrega(db.Model):
             'data_atualizacao': self.data_atualizacao.isoformat() if self.data_atualizacao else None,
             'motorista_id': self.motorista_id
         }
-        
-        for key, value in data.items():
-            if isinstance(value, (datetime, date)):
-                data[key] = value.isoformat()
-        
-        data['STATUS'] = self.calcular_status(feriados_customizados)
-        data['DIASATRASO'] = self.calcular_dias_atraso(feriados_customizados)
-        data['PRAZOMEDIO'] = self.calcular_prazo_medio(feriados_customizados)
+
+        if self.STATUSPRAZO is not None and not feriados_customizados:
+            data['STATUS'] = self.STATUSPRAZO
+            data['DIASATRASO'] = self.DIASATRASO
+            data['PRAZOMEDIO'] = self.PRAZOMEDIO
+        else:
+            data['STATUS'] = self.calcular_status(feriados_customizados)
+            data['DIASATRASO'] = self.calcular_dias_atraso(feriados_customizados)
+            data['PRAZOMEDIO'] = self.calcular_prazo_medio(feriados_customizados)
 
         if self.motorista:
             data['motorista_nome'] = self.motorista.nome
@@ -164,4 +229,38 @@ class Entrega(db.Model):
         return data
 
     def __repr__(self):
-        return f'<Entrega {self.NUMNOTA}>'
\ No newline at end of file
+        return f'<Entrega {self.NUMNOTA}>'
+
+
+@event.listens_for(Entrega, 'before_insert')
+@event.listens_for(Entrega, 'before_update')
+def _materializar_indicadores(mapper, connection, target):
+    estado = inspect(target)
+    if target.STATUSPRAZO is None or any(estado.attrs[campo].history.has_changes() for campo in CAMPOS_INDICADORES):
+        target.atualizar_indicadores()
+
+
+db.Index('ix_entregas_DTFAT_id', Entrega.DTFAT, Entrega.id)
+
+db.Index('ix_entregas_data_atualizacao_id', Entrega.data_atualizacao, Entrega.id)
+
+db.Index(
+    'ix_entregas_motorista_id',
+    Entrega.motorista_id,
+    postgresql_where=Entrega.motorista_id.isnot(None),
+    sqlite_where=Entrega.motorista_id.isnot(None)
+)
+
+db.Index(
+    'ix_entregas_PREVISAOENTREGA_abertas',
+    Entrega.PREVISAOENTREGA,
+    postgresql_where=Entrega.DATAFINALIZACAO.is_(None),
+    sqlite_where=Entrega.DATAFINALIZACAO.is_(None)
+)
+
+db.Index(
+    'ix_entregas_data_limite_abertas',
+    Entrega.data_limite,
+    postgresql_where=Entrega.DATAFINALIZACAO.is_(None),
+    sqlite_where=Entrega.DATAFINALIZACAO.is_(None)
+)
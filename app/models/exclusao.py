@@ -0,0 +1,30 @@
+from app.extensions import db
+from datetime import datetime
+from sqlalchemy import event
+
+class Exclusao(db.Model):
+    __tablename__ = 'exclusoes'
+    __table_args__ = (
+        db.Index('ix_exclusoes_tabela_data_exclusao', 'tabela', 'data_exclusao'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    tabela = db.Column(db.String(50), nullable=False)
+    registro_id = db.Column(db.Integer, nullable=False)
+    data_exclusao = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f'<Exclusao {self.tabela} {self.registro_id} em {self.data_exclusao}>'
+
+
+def registrar_exclusoes(modelo):
+    # Lápide para a sincronização incremental: sem ela, o cliente que pede só o
+    # que mudou nunca fica sabendo de um registro removido.
+    @event.listens_for(modelo, 'after_delete')
+    def _registrar_exclusao(mapper, connection, target):
+        connection.execute(Exclusao.__table__.insert().values(
+            tabela=mapper.local_table.name,
+            registro_id=target.id,
+            data_exclusao=datetime.utcnow()
+        ))
+    return modelo
@@ -0,0 +1,54 @@
+from app.extensions import db
+from datetime import datetime
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+
+FERIADO_ESCOPOS = ('NACIONAL', 'UF', 'MUNICIPAL')
+
+class Feriado(db.Model):
+    __tablename__ = 'feriados'
+
+    id = db.Column(db.Integer, primary_key=True)
+    data = db.Column(db.Date, nullable=False, index=True)
+    descricao = db.Column(db.String(100), nullable=False)
+    escopo = db.Column(db.String(20), nullable=False, default='NACIONAL')
+    uf = db.Column(db.String(2), nullable=True)
+    municipio = db.Column(db.String(50), nullable=True)
+    data_criacao = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    data_atualizacao = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'data': self.data.isoformat() if self.data else None,
+            'descricao': self.descricao,
+            'escopo': self.escopo,
+            'uf': self.uf,
+            'municipio': self.municipio,
+            'data_criacao': self.data_criacao.isoformat() if self.data_criacao else None,
+            'data_atualizacao': self.data_atualizacao.isoformat() if self.data_atualizacao else None
+        }
+
+    def __repr__(self):
+        return f'<Feriado {self.data} - {self.descricao} ({self.escopo})>'
+
+
+@event.listens_for(Feriado, 'after_insert')
+@event.listens_for(Feriado, 'after_update')
+@event.listens_for(Feriado, 'after_delete')
+def _marcar_feriados_alterados(mapper, connection, target):
+    sessao = object_session(target)
+    if sessao is not None:
+        sessao.info['feriados_alterados'] = True
+
+
+@event.listens_for(Session, 'after_commit')
+def _recarregar_feriados_apos_commit(sessao):
+    if sessao.info.pop('feriados_alterados', False):
+        from app.utils.calendario import calendario
+        calendario.invalidar_feriados_cadastrados()
+
+
+@event.listens_for(Session, 'after_rollback')
+def _descartar_alteracoes_feriados(sessao):
+    sessao.info.pop('feriados_alterados', None)
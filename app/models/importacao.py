@@ -0,0 +1,73 @@
+from app.extensions import db
+from datetime import datetime
+
+IMPORTACAO_STATUS = ('PENDENTE', 'PROCESSANDO', 'CONCLUIDA', 'FALHOU')
+
+class Importacao(db.Model):
+    __tablename__ = 'importacoes'
+
+    id = db.Column(db.Integer, primary_key=True)
+    nome_arquivo = db.Column(db.String(255), nullable=False)
+    caminho_arquivo = db.Column(db.String(500), nullable=False)
+    streaming = db.Column(db.Boolean, nullable=False, default=False)
+    atualizar_existentes = db.Column(db.Boolean, nullable=False, default=True)
+    status = db.Column(db.String(20), nullable=False, default='PENDENTE')
+    usuario = db.Column(db.String(100), nullable=True)
+    linhas_processadas = db.Column(db.Integer, nullable=False, default=0)
+    inseridas = db.Column(db.Integer, nullable=False, default=0)
+    atualizadas = db.Column(db.Integer, nullable=False, default=0)
+    ignoradas = db.Column(db.Integer, nullable=False, default=0)
+    rejeitadas = db.Column(db.Integer, nullable=False, default=0)
+    lotes_processados = db.Column(db.Integer, nullable=False, default=0)
+    erros = db.Column(db.JSON, nullable=True)
+    mensagem = db.Column(db.Text, nullable=True)
+    data_criacao = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    data_inicio = db.Column(db.DateTime, nullable=True)
+    data_fim = db.Column(db.DateTime, nullable=True)
+    # Renovado periodicamente pelo processo que executa a importação; parado indica importação órfã.
+    data_atualizacao = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=True)
+
+    def registrar_lote(self, resultado_lote: dict, erros_lote: list[dict], max_erros: int):
+        self.linhas_processadas += resultado_lote['linhas']
+        self.inseridas += resultado_lote['inseridas']
+        self.atualizadas += resultado_lote['atualizadas']
+        self.ignoradas += resultado_lote['ignoradas']
+        self.rejeitadas += resultado_lote['rejeitadas']
+        self.lotes_processados += 1
+
+        erros = list(self.erros or [])
+        if erros_lote and len(erros) < max_erros:
+            self.erros = erros + erros_lote[:max_erros - len(erros)]
+
+    def linhas_por_segundo(self) -> float | None:
+        if not self.data_inicio:
+            return None
+        duracao = ((self.data_fim or datetime.utcnow()) - self.data_inicio).total_seconds()
+        if duracao <= 0:
+            return None
+        return round(self.linhas_processadas / duracao, 1)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'nome_arquivo': self.nome_arquivo,
+            'streaming': self.streaming,
+            'atualizar_existentes': self.atualizar_existentes,
+            'status': self.status,
+            'usuario': self.usuario,
+            'linhas_processadas': self.linhas_processadas,
+            'inseridas': self.inseridas,
+            'atualizadas': self.atualizadas,
+            'ignoradas': self.ignoradas,
+            'rejeitadas': self.rejeitadas,
+            'lotes_processados': self.lotes_processados,
+            'linhas_por_segundo': self.linhas_por_segundo(),
+            'erros': self.erros or [],
+            'mensagem': self.mensagem,
+            'data_criacao': self.data_criacao.isoformat() if self.data_criacao else None,
+            'data_inicio': self.data_inicio.isoformat() if self.data_inicio else None,
+            'data_fim': self.data_fim.isoformat() if self.data_fim else None
+        }
+
+    def __repr__(self):
+        return f'<Importacao {self.id} - {self.nome_arquivo} - Status: {self.status}>'
@@ -0,0 +1,44 @@
+from app.extensions import db
+from datetime import datetime
+
+class MetricaEntregaDiaria(db.Model):
+    __tablename__ = 'metricas_entregas_diarias'
+    __table_args__ = (
+        db.Index('ix_metricas_entregas_diarias_dia', 'dia'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    dia = db.Column(db.Date, nullable=False)
+    uf = db.Column(db.String(2), nullable=False)
+    transportadora = db.Column(db.String(200), nullable=False)
+    situacao = db.Column(db.String(50), nullable=False)
+    quantidade = db.Column(db.Integer, nullable=False, default=0)
+    valor_total = db.Column(db.Float, nullable=False, default=0)
+    peso_total = db.Column(db.Float, nullable=False, default=0)
+    dias_atraso_total = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<MetricaEntregaDiaria {self.dia} {self.uf} {self.transportadora} - {self.situacao}>'
+
+
+class ControleMetricas(db.Model):
+    __tablename__ = 'metricas_controle'
+
+    id = db.Column(db.Integer, primary_key=True)
+    nome = db.Column(db.String(50), unique=True, nullable=False)
+    marca_atualizacao = db.Column(db.DateTime, nullable=True)
+    data_referencia = db.Column(db.Date, nullable=True)
+    data_execucao = db.Column(db.DateTime, nullable=True)
+    dias_recalculados = db.Column(db.Integer, nullable=False, default=0)
+
+    def to_dict(self):
+        return {
+            'nome': self.nome,
+            'marca_atualizacao': self.marca_atualizacao.isoformat() if self.marca_atualizacao else None,
+            'data_referencia': self.data_referencia.isoformat() if self.data_referencia else None,
+            'data_execucao': self.data_execucao.isoformat() if self.data_execucao else None,
+            'dias_recalculados': self.dias_recalculados
+        }
+
+    def __repr__(self):
+        return f'<ControleMetricas {self.nome} até {self.marca_atualizacao}>'
@@ -3,6 +3,9 @@ from datetime import datetime
 
 class Rastreamento(db.Model):
     __tablename__ = 'rastreamento'
+    __table_args__ = (
+        db.Index('ix_rastreamento_entrega_id_timestamp', 'entrega_id', 'timestamp'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     timestamp = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
@@ -12,5 +15,14 @@ class Rastreamento(db.Model):
     entrega_id = db.Column(db.Integer, db.ForeignKey('entregas.id'))
     entrega = db.relationship('Entrega', back_populates='rastreamentos')
     
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'entrega_id': self.entrega_id,
+            'timestamp': self.timestamp.isoformat() if self.timestamp else None,
+            'status_descricao': self.status_descricao,
+            'localizacao': self.localizacao
+        }
+
     def __repr__(self):
         return f'<Rastreamento {self.id} - {self.status_descricao}>'
\ No newline at end of file
@@ -8,6 +8,11 @@ class Transportadora(db.Model):
 
     api_config_key = db.Column(db.String(50), unique=True, nullable=True)
 
+    # Vazios usam os padrões PROTECAO_* do Config.
+    limite_requisicoes_por_minuto = db.Column(db.Integer, nullable=True)
+    limite_falhas_circuito = db.Column(db.Integer, nullable=True)
+    tempo_abertura_circuito_segundos = db.Column(db.Integer, nullable=True)
+
     entregas = db.relationship('Entrega', back_populates='transportadora', foreign_keys='Entrega.transportadora_cod')
 
     def __repr__(self):
@@ -0,0 +1,57 @@
+from flask import Blueprint, current_app, jsonify
+from flask_jwt_extended import jwt_required
+from app.extensions import scheduler
+from app.jobs import tarefa_atualizar_metricas
+from app.utils.decorators import role_required
+from app.utils.calendario import calendario
+from app.utils.cache import cache
+from app.clients.token_cache import tokens_transportadoras
+from app.clients.transporte import transporte
+from app.clients.protecao import protecao_transportadoras
+
+admin_bp = Blueprint('admin', __name__, url_prefix='/api/admin')
+
+@admin_bp.route('/calendario/estatisticas', methods=['GET'])
+@jwt_required()
+@role_required(['admin'])
+def estatisticas_calendario():
+    return jsonify(calendario.estatisticas()), 200
+
+@admin_bp.route('/cache/estatisticas', methods=['GET'])
+@jwt_required()
+@role_required(['admin'])
+def estatisticas_cache():
+    return jsonify(cache.estatisticas()), 200
+
+@admin_bp.route('/metricas/reconstruir', methods=['POST'])
+@jwt_required()
+@role_required(['admin'])
+def reconstruir_metricas():
+    scheduler.add_job(
+        id='tarefa_reconstruir_metricas_manual',
+        func=tarefa_atualizar_metricas,
+        args=[current_app._get_current_object(), True],
+        replace_existing=True
+    )
+    return jsonify({"mensagem": "Reconstrução das métricas de entregas agendada."}), 202
+
+@admin_bp.route('/transportadoras/tokens', methods=['GET'])
+@jwt_required()
+@role_required(['admin'])
+def estatisticas_tokens_transportadoras():
+    return jsonify(tokens_transportadoras.estatisticas()), 200
+
+@admin_bp.route('/transportadoras/conexoes', methods=['GET'])
+@jwt_required()
+@role_required(['admin'])
+def estatisticas_conexoes_transportadoras():
+    return jsonify(transporte.estatisticas()), 200
+
+
+@admin_bp.route('/transportadoras/circuitos', methods=['GET'])
+@jwt_required()
+@role_required(['admin'])
+def estatisticas_circuitos_transportadoras():
+    # Lista também as transportadoras configuradas que ainda não foram chamadas.
+    protecao_transportadoras.carregar_configuracao()
+    return jsonify(protecao_transportadoras.estatisticas()), 200
@@ -7,6 +7,8 @@ from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
 from werkzeug.utils import secure_filename
 from datetime import datetime, date
 from app.utils.decorators import role_required
+from app.utils.cache import cache_resposta
+from app.utils.sincronizacao import SincronizacaoExpiradaError, consultar_alteracoes, resposta_alteracoes
 
 comprovante_bp = Blueprint('comprovantes', __name__, url_prefix='/api/comprovantes')
 
@@ -108,7 +110,20 @@ def buscar_comprovante_por_id(comprovante_id):
 @comprovante_bp.route('/', methods=['GET'])
 @jwt_required()
 @role_required(['agente', 'admin'])
+@cache_resposta('comprovantes')
 def listar_todos_comprovantes():
+    since = request.args.get('since')
+    if since:
+        try:
+            comprovantes, removidos, proximo, tem_mais = consultar_alteracoes(
+                Comprovante.query, Comprovante, since, request.args.get('per_page', 100, type=int)
+            )
+        except SincronizacaoExpiradaError as e:
+            return jsonify({"message": str(e)}), 410
+        except ValueError:
+            return jsonify({"message": "Parâmetro 'since' inválido. Use o 'next_since' da resposta anterior ou uma data ISO 8601."}), 400
+        return jsonify(resposta_alteracoes([c.to_dict() for c in comprovantes], removidos, proximo, tem_mais)), 200
+
     comprovantes = Comprovante.query.all()
     if not comprovantes:
         return jsonify({"message": "Nenhum comprovante encontrado."}), 404
@@ -5,6 +5,7 @@ from app.models.entrega import Entrega
 from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
 from datetime import datetime
 from app.utils.decorators import role_required
+from app.utils.sincronizacao import SincronizacaoExpiradaError, consultar_alteracoes, resposta_alteracoes
 
 devolucao_bp = Blueprint('devolucoes', __name__, url_prefix='/api/devolucoes')
 
@@ -91,6 +92,18 @@ def listar_devolucoes_por_entrega(entrega_id):
 @jwt_required()
 @role_required(['agente', 'admin'])
 def listar_todas_devolucoes():
+    since = request.args.get('since')
+    if since:
+        try:
+            devolucoes, removidos, proximo, tem_mais = consultar_alteracoes(
+                Devolucao.query, Devolucao, since, request.args.get('per_page', 100, type=int)
+            )
+        except SincronizacaoExpiradaError as e:
+            return jsonify({"message": str(e)}), 410
+        except ValueError:
+            return jsonify({"message": "Parâmetro 'since' inválido. Use o 'next_since' da resposta anterior ou uma data ISO 8601."}), 400
+        return jsonify(resposta_alteracoes([d.to_dict() for d in devolucoes], removidos, proximo, tem_mais)), 200
+
     devolucoes = Devolucao.query.all()
     if not devolucoes:
         return jsonify({"message": "Nenhuma devolução encontrada."}), 404
@@ -1,22 +1,89 @@
 from datetime import datetime, date, timedelta
-from workalendar.america import Brazil
-from flask import Blueprint, current_app, request, jsonify
+from flask import Blueprint, Response, current_app, request, jsonify, stream_with_context, url_for
+from werkzeug.utils import secure_filename
 from app.extensions import db
-from app.jobs import tarefa_rastreamento_especifico 
+from app.jobs import tarefa_rastreamento_especifico, agendar_importacao
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app.models.rastreamento import Rastreamento
 from app.utils.decorators import role_required
+from app.utils.importacao import TAMANHO_CONSULTA_CHAVES, upsert_entregas
+from app.utils.calendario import calcular_previsao_entrega
+from app.utils.indicadores import materializar_por_chaves
+from app.utils.paginacao import CursorInvalidoError, codificar_cursor, decodificar_cursor
+from sqlalchemy import select, tuple_, update
+from app.utils.serializacao import SerializadorEntrega, campos_solicitados
+from app.utils.metricas import consultar_metricas
+from app.utils.http_cache import responder_condicional
+from app.utils.cache import cache_resposta
+from app.utils.sincronizacao import SincronizacaoExpiradaError, consultar_alteracoes, resposta_alteracoes
+from app.utils.exportacao import FORMATOS_EXPORTACAO, gerar_csv, gerar_xlsx, ler_arquivo, remover_arquivo
 import pandas as pd
-import io
+import os
+import uuid
 import re
 
 from app.models.motorista import Motorista
 from app.models.comprovante import Comprovante
 from app.models.entrega import Entrega
 from app.models.devolucao import Devolucao
+from app.models.importacao import Importacao
+from app.models.exclusao import Exclusao
 
 entrega_bp = Blueprint('entregas', __name__, url_prefix='/api/entregas')
 
+ORDENACOES_ENTREGAS = {
+    'data_limite': Entrega.data_limite,
+    'situacao': Entrega.situacao_prazo,
+    'DTFAT': Entrega.DTFAT,
+    'PREVISAOENTREGA': Entrega.PREVISAOENTREGA,
+    'NUMNOTA': Entrega.NUMNOTA,
+}
+
+def filtrar_entregas(query, args):
+    status = args.get('status')
+    situacao = args.get('situacao')
+    num_nota = args.get('num_nota', type=int)
+    transportadora = args.get('transportadora')
+    data_inicial_str = args.get('data_inicial')
+    data_final_str = args.get('data_final')
+
+    if status:
+        query = query.filter_by(STATUS=status)
+
+    if situacao:
+        query = query.filter(Entrega.filtro_situacao(situacao))
+
+    if num_nota:
+        query = query.filter_by(NUMNOTA=num_nota)
+
+    if transportadora:
+        query = query.filter(Entrega.TRANSPORTADORA.ilike(f'%{transportadora}%'))
+
+    if data_inicial_str:
+        try:
+            data_inicial = datetime.strptime(data_inicial_str, '%Y-%m-%d').date()
+        except ValueError:
+            raise ValueError("Formato de data_inicial inválido. Use YYYY-MM-DD.")
+        query = query.filter(Entrega.DTFAT >= data_inicial)
+
+    if data_final_str:
+        try:
+            data_final = datetime.strptime(data_final_str, '%Y-%m-%d').date()
+        except ValueError:
+            raise ValueError("Formato de data_final inválido. Use YYYY-MM-DD.")
+        query = query.filter(Entrega.DTFAT < data_final + timedelta(days=1))
+
+    return query
+
+def ordenar_entregas(query, ordenar: str | None):
+    if not ordenar:
+        return query.order_by(Entrega.DTFAT.desc(), Entrega.id.desc())
+
+    campo = ORDENACOES_ENTREGAS.get(ordenar.lstrip('-'))
+    if campo is None:
+        raise ValueError(f"Ordenação inválida. Use: {', '.join(ORDENACOES_ENTREGAS)} (prefixo '-' para decrescente).")
+    return query.order_by(campo.desc() if ordenar.startswith('-') else campo.asc(), Entrega.id)
+
 def extrair_numero_dias(prazo_str: str) -> int | None:
     if not isinstance(prazo_str, str):
         return None
@@ -25,21 +92,22 @@ def extrair_numero_dias(prazo_str: str) -> int | None:
         return int(match.group())
     return None
 
-def calcular_data_final_util(data_inicial: date, quantidade_dias_uteis: int, feriados_customizados: list[date] = None) -> date | None:
+def calcular_data_final_util(data_inicial: date, quantidade_dias_uteis: int, feriados_customizados: list[date] = None,
+                             uf: str | None = None, municipio: str | None = None) -> date | None:
     if not isinstance(data_inicial, date) or not isinstance(quantidade_dias_uteis, int) or quantidade_dias_uteis < 0:
         return None
     
-    cal = Brazil()
+    feriados_validos = []
     if feriados_customizados:
         for holiday_date in feriados_customizados:
             if isinstance(holiday_date, date):
-                cal.add_holiday((holiday_date.year, holiday_date.month, holiday_date.day, "Feriado Customizado"))
+                feriados_validos.append(holiday_date)
             else:
                 print(f'Feriado {holiday_date} não é uma data válida. Ignorando.')
     
     try:
-        data_final = cal.add_working_days(data_inicial, quantidade_dias_uteis)
-        return data_final
+        data_final = calcular_previsao_entrega(data_inicial, quantidade_dias_uteis, feriados_validos, uf, municipio)
+        return data_final.date() if data_final else None
     except Exception as e:
         print(f'Erro ao calcular data final: {e}')
         return None
@@ -54,7 +122,7 @@ def safe_date_converter(date_val, format_str='%Y-%m-%d %H:%M:%S'):
     else:
         return date_val
 
-def criar_entrega_com_dados(data: dict):
+def montar_registro_entrega(data: dict) -> dict:
     dt_fat = safe_date_converter(data['DTFAT'])
     dt_carregamento = safe_date_converter(data['DTCARREGAMENTO'])
 
@@ -66,53 +134,55 @@ def criar_entrega_com_dados(data: dict):
     if data.get('AGENDAMENTO'):
         agendamento = safe_date_converter(data['AGENDAMENTO'])
 
-    previsao_entrega = None
     if dt_carregamento and 'PRAZOENTREGA' in data and isinstance(data['PRAZOENTREGA'], int):
-        data_prev_entrega_date = calcular_data_final_util(
-            data_inicial=dt_carregamento.date(),
-            quantidade_dias_uteis=data['PRAZOENTREGA']
+        # A previsão fica à meia-noite do dia útil, como na importação em lote e como
+        # definir_previsao_entrega já gravava (antes sobrescrevia a hora do carregamento).
+        previsao_entrega = calcular_previsao_entrega(
+            dt_carregamento, data['PRAZOENTREGA'], uf=data.get('UF'), municipio=data.get('MUNICIPIO')
         )
-        if data_prev_entrega_date:
-            previsao_entrega = datetime.combine(data_prev_entrega_date, dt_carregamento.time())
     else:
         raise ValueError('DTCARREGAMENTO ou PRAZOENTREGA inválidos.')
 
-    nova_entrega = Entrega(
-        CODFILIAL=int(data['CODFILIAL']),
-        DTFAT=dt_fat,
-        DTCARREGAMENTO=dt_carregamento,
-        ROMANEIO=int(data['ROMANEIO']),
-        TIPOVENDA=int(data['TIPOVENDA']),
-        NUMNOTA=int(data['NUMNOTA']),
-        NUMPED=int(data['NUMPED']),
-        CODCLI=int(data['CODCLI']),
-        CLIENTE=str(data['CLIENTE']),
-        MUNICIPIO=str(data['MUNICIPIO']),
-        UF=str(data['UF']),
-        EMAIL=data.get('EMAIL'),
-        TELCOM=data.get('TELCOM'),
-        EMAIL_1=data.get('EMAIL_1'),
-        CODFORNECFRETE=data.get('CODFORNECFRETE'),
-        TRANSPORTADORA=data.get('TRANSPORTADORA'),
-        VLTOTAL=float(data['VLTOTAL']),
-        NUMVOLUME=int(data['NUMVOLUME']),
-        TOTPESO=float(data['TOTPESO']),
-        PRAZOENTREGA=int(data['PRAZOENTREGA']),
-        CHAVENFE=str(data['CHAVENFE']),
-        DATAFINALIZACAO=data_finalizacao,
-        AGENDAMENTO=agendamento,
-        PREVISAOENTREGA=previsao_entrega,
-        motorista_id=data.get('motorista_id')
-    )
+    registro = {
+        'CODFILIAL': int(data['CODFILIAL']),
+        'DTFAT': dt_fat,
+        'DTCARREGAMENTO': dt_carregamento,
+        'ROMANEIO': int(data['ROMANEIO']),
+        'TIPOVENDA': int(data['TIPOVENDA']),
+        'NUMNOTA': int(data['NUMNOTA']),
+        'NUMPED': int(data['NUMPED']),
+        'CODCLI': int(data['CODCLI']),
+        'CLIENTE': str(data['CLIENTE']),
+        'MUNICIPIO': str(data['MUNICIPIO']),
+        'UF': str(data['UF']),
+        'EMAIL': data.get('EMAIL'),
+        'TELCOM': data.get('TELCOM'),
+        'EMAIL_1': data.get('EMAIL_1'),
+        'CODFORNECFRETE': data.get('CODFORNECFRETE'),
+        'TRANSPORTADORA': data.get('TRANSPORTADORA'),
+        'VLTOTAL': float(data['VLTOTAL']),
+        'NUMVOLUME': int(data['NUMVOLUME']),
+        'TOTPESO': float(data['TOTPESO']),
+        'PRAZOENTREGA': int(data['PRAZOENTREGA']),
+        'CHAVENFE': str(data['CHAVENFE']),
+        'DATAFINALIZACAO': data_finalizacao,
+        'AGENDAMENTO': agendamento,
+        'PREVISAOENTREGA': previsao_entrega,
+        'motorista_id': data.get('motorista_id')
+    }
     
-    if nova_entrega.CODFORNECFRETE is not None:
-        nova_entrega.CODFORNECFRETE = int(nova_entrega.CODFORNECFRETE)
-    if nova_entrega.motorista_id is not None:
-        nova_entrega.motorista_id = int(nova_entrega.motorista_id)
+    if registro['CODFORNECFRETE'] is not None:
+        registro['CODFORNECFRETE'] = int(registro['CODFORNECFRETE'])
+    if registro['motorista_id'] is not None:
+        registro['motorista_id'] = int(registro['motorista_id'])
+
+    # Campos opcionais ausentes do JSON não entram no upsert e mantêm o valor gravado;
+    # enviados como null, limpam o campo.
+    for campo in ('EMAIL', 'TELCOM', 'EMAIL_1', 'CODFORNECFRETE', 'DATAFINALIZACAO', 'AGENDAMENTO', 'motorista_id'):
+        if campo not in data:
+            registro.pop(campo)
     
-    nova_entrega.definir_previsao_entrega()
-    db.session.add(nova_entrega)
-    return nova_entrega
+    return registro
 
 @entrega_bp.route('/', methods=['POST'])
 @jwt_required()
@@ -128,14 +198,17 @@ def create_entrega():
     for field in required_fields:
         if field not in data:
             return jsonify({"message": f"Campo '{field}' é obrigatório."}), 400
-    
-    if Entrega.query.filter_by(CHAVENFE=data['CHAVENFE']).first():
-        return jsonify({"message": "Chave NFe já cadastrada."}), 409
 
     try:
-        nova_entrega = criar_entrega_com_dados(data)
+        registro = montar_registro_entrega(data)
+        ja_cadastrada = registro['CHAVENFE'] not in upsert_entregas([registro])
+        materializar_por_chaves([registro['CHAVENFE']])
         db.session.commit()
-        return jsonify({"message": "Entrega criada com sucesso!", "entrega": nova_entrega.to_dict()}), 201
+
+        entrega = Entrega.query.filter_by(CHAVENFE=registro['CHAVENFE']).one()
+        if ja_cadastrada:
+            return jsonify({"message": "Entrega atualizada com sucesso!", "entrega": entrega.to_dict()}), 200
+        return jsonify({"message": "Entrega criada com sucesso!", "entrega": entrega.to_dict()}), 201
     except ValueError as ve:
         db.session.rollback()
         return jsonify({"message": f"Erro de formato de dados: {str(ve)}. Verifique tipos e formatos de data (YYYY-MM-DD HH:MM:SS)."}), 400
@@ -147,6 +220,8 @@ def create_entrega():
 @jwt_required()
 @role_required(['admin'])
 def importar_excel():
+    request.max_content_length = current_app.config['IMPORTACAO_MAX_CONTENT_LENGTH']
+
     if 'file' not in request.files:
         return jsonify({"mensagem": "Nenhum arquivo enviado"}), 400
 
@@ -155,78 +230,56 @@ def importar_excel():
         return jsonify({"mensagem": "Nenhum arquivo selecionado"}), 400
     
     filename_lower = file.filename.lower()
-    df = None
+    if not filename_lower.endswith(('.xlsx', '.xls', '.csv')):
+        return jsonify({"message": "Formato de arquivo não suportado. Use .xlsx, .xls ou .csv."}), 400
+
+    streaming = request.args.get('streaming', 'false').lower() in ('1', 'true', 'sim')
+    atualizar = request.args.get('atualizar', 'true').lower() in ('1', 'true', 'sim')
+    filename = secure_filename(file.filename)
+    caminho_arquivo = os.path.join(current_app.config['IMPORTACAO_DIR'], f"{uuid.uuid4().hex}_{filename}")
 
     try:
-        if filename_lower.endswith(('.xlsx', '.xls')):
-            df = pd.read_excel(file, engine='openpyxl')
-        elif filename_lower.endswith('.csv'):
-            file_stream = io.StringIO(file.stream.read().decode('utf-8'))
-            df = pd.read_csv(file_stream)
-        else:
-            return jsonify({"message": "Formato de arquivo não suportado. Use .xlsx, .xls ou .csv."}), 400
-       
+        file.save(caminho_arquivo)
     except Exception as e:
-        return jsonify({"mensagem": f"Erro ao ler o arquivo: {str(e)}"}), 500
-    
+        return jsonify({"mensagem": f"Erro ao salvar o arquivo: {str(e)}"}), 500
+
+    importacao = Importacao(
+        nome_arquivo=file.filename,
+        caminho_arquivo=caminho_arquivo,
+        streaming=streaming,
+        atualizar_existentes=atualizar,
+        usuario=get_jwt_identity()
+    )
+    db.session.add(importacao)
     try:
-        required_excel_cols = ["CODFILIAL", "DTFAT", "DTCARREGAMENTO", "ROMANEIO", "TIPOVENDA", 
-                              "NUMNOTA", "NUMPED", "CODCLI", "CLIENTE", "MUNICIPIO", "UF", 
-                              "VLTOTAL", "NUMVOLUME", "TOTPESO", "PRAZOENTREGA", "CHAVENFE", "CODFORNECFRETE"]
-        
-        if not all(col in df.columns for col in required_excel_cols):
-            missing_cols = [col for col in required_excel_cols if col not in df.columns]
-            return jsonify({"mensagem": f"Arquivo Excel não possui todas as colunas obrigatórias. Faltando: {', '.join(missing_cols)}"}), 400
-
-        entregas_importadas = []
-        for index, row in df.iterrows():
-            data_entrega = row.to_dict()
-            
-            if Entrega.query.filter_by(CHAVENFE=data_entrega['CHAVENFE']).first():
-                continue
-
-            for date_field in ['DTFAT', 'DTCARREGAMENTO', 'DATAFINALIZACAO', 'AGENDAMENTO']:
-                if isinstance(data_entrega.get(date_field), datetime):
-                    data_entrega[date_field] = data_entrega[date_field].strftime('%Y-%m-%d %H:%M:%S')
-
-            nova_entrega = Entrega(
-                CODFILIAL=row['CODFILIAL'],
-                DTFAT=pd.to_datetime(row['DTFAT']),
-                DTCARREGAMENTO=pd.to_datetime(row['DTCARREGAMENTO']),
-                ROMANEIO=row['ROMANEIO'],
-                TIPOVENDA=row['TIPOVENDA'],
-                NUMNOTA=row['NUMNOTA'],
-                NUMPED=row['NUMPED'],
-                CODCLI=row['CODCLI'],
-                CLIENTE=row['CLIENTE'],
-                MUNICIPIO=row['MUNICIPIO'],
-                UF=row['UF'],
-                VLTOTAL=row['VLTOTAL'],
-                NUMVOLUME=row['NUMVOLUME'],
-                TOTPESO=row['TOTPESO'],
-                PRAZOENTREGA=row['PRAZOENTREGA'],
-                CHAVENFE=row['CHAVENFE'],
-                transportadora_cod=int(row['CODFORNECFRETE']),
-                TRANSPORTADORA=row['TRANSPORTADORA']
-            )
-           
-            db.session.add(nova_entrega) 
-        
         db.session.commit()
-        
-        return jsonify({"mensagem": f"{len(df)} linhas processadas. Entregas novas e atualizadas foram salvas."}), 200
-
-    except KeyError as e:
-        db.session.rollback()
-        return jsonify({"mensagem": f"Erro de processamento: a coluna {str(e)} não foi encontrada no arquivo."}), 500
     except Exception as e:
         db.session.rollback()
-        print(f"ERRO COMPLETO: {e}") 
-        return jsonify({"mensagem": f"Erro ao processar o arquivo: {str(e)}"}), 500
+        os.remove(caminho_arquivo)
+        return jsonify({"mensagem": f"Erro ao registrar a importação: {str(e)}"}), 500
 
-@entrega_bp.route('/<int:id>', methods=['GET'])
+    agendar_importacao(current_app._get_current_object(), importacao.id)
+
+    status_url = url_for('entregas.consultar_importacao', importacao_id=importacao.id)
+    return jsonify({
+        "mensagem": "Arquivo recebido. A importação será processada em segundo plano.",
+        "importacao_id": importacao.id,
+        "status_url": status_url
+    }), 202, {'Location': status_url}
+
+@entrega_bp.route('/importacoes/<int:importacao_id>', methods=['GET'])
+@jwt_required()
+@role_required(['admin'])
+def consultar_importacao(importacao_id):
+    importacao = db.session.get(Importacao, importacao_id)
+    if not importacao:
+        return jsonify({"mensagem": "Importação não encontrada."}), 404
+    return jsonify(importacao.to_dict()), 200
+
+@entrega_bp.route('/<int:entrega_id>', methods=['GET'])
 @jwt_required()
 @role_required(['agente', 'admin', 'motorista'])
+@cache_resposta('entregas', 'motoristas', 'feriados')
 def buscar_entrega_por_id(entrega_id):
     entrega = Entrega.query.get(entrega_id)
     if not entrega:
@@ -241,11 +294,6 @@ def calcular_e_salva_previsao_entrega(entrega_id):
     if not entrega:
         return jsonify({'error': 'Entrega não encontrada'}), 404
 
-    feriados_adicionais = [
-        date(2025, 1, 1),
-        date(2025, 11, 20)
-    ]
-
     response_data = {}
 
     if not entrega.DTCARREGAMENTO:
@@ -263,7 +311,8 @@ def calcular_e_salva_previsao_entrega(entrega_id):
     data_previsao_entrega = calcular_data_final_util(
         data_inicial=data_carregamento_date,
         quantidade_dias_uteis=quantidade_dias,
-        feriados_customizados=feriados_adicionais
+        uf=entrega.UF,
+        municipio=entrega.MUNICIPIO
     )
 
     if data_previsao_entrega: 
@@ -322,7 +371,7 @@ def listar_comprovantes_por_entrega(entrega_id):
     
     return jsonify([comprovante.to_dict() for comprovante in comprovantes_lista])
 
-@entrega_bp.route('/int:entrega_id>/atribuir_motorista', methods=['PATCH'])
+@entrega_bp.route('/<int:entrega_id>/atribuir_motorista', methods=['PATCH'])
 @jwt_required()
 @role_required(['admin', 'agente'])
 def atribuir_motorista_entrega(entrega_id):
@@ -346,77 +395,236 @@ def atribuir_motorista_entrega(entrega_id):
 
     return jsonify({
         "message":f"Entrega {entrega_id} atribuida com sucesso ao motorista {motorista_id}.",
-        "entrega": entrega.to.dict()
+        "entrega": entrega.to_dict()
     }), 200
 
+@entrega_bp.route('/atribuir_motorista', methods=['PATCH'])
+@jwt_required()
+@role_required(['admin', 'agente'])
+def atribuir_motorista_em_lote():
+    data = request.get_json() or {}
+    motorista_id = data.get('motorista_id')
+    romaneio = data.get('romaneio')
+    ids = data.get('ids')
+    chaves = data.get('chaves')
+    incluir_finalizadas = bool(data.get('incluir_finalizadas', False))
+
+    if not motorista_id:
+        return jsonify({"message": "ID do motorista é obrigatório para atribuição."}), 400
+
+    seletores = [seletor for seletor in (romaneio, ids, chaves) if seletor not in (None, [])]
+    if len(seletores) != 1:
+        return jsonify({"message": "Informe apenas um entre 'romaneio', 'ids' ou 'chaves'."}), 400
+
+    lista = ids if ids is not None else chaves
+    if lista is not None:
+        if not isinstance(lista, list):
+            return jsonify({"message": "'ids' e 'chaves' devem ser listas."}), 400
+        if len(lista) > TAMANHO_CONSULTA_CHAVES:
+            return jsonify({"message": f"Envie no máximo {TAMANHO_CONSULTA_CHAVES} entregas por atribuição."}), 400
+
+    motorista = db.session.get(Motorista, motorista_id)
+    if not motorista:
+        return jsonify({"message": "Motorista não encontrado."}), 404
+    if not motorista.ativo:
+        return jsonify({"message": "Motorista inativo não pode receber entregas."}), 400
+
+    try:
+        if romaneio is not None:
+            filtro = Entrega.ROMANEIO == int(romaneio)
+        elif ids is not None:
+            filtro = Entrega.id.in_([int(entrega_id) for entrega_id in ids])
+        else:
+            filtro = Entrega.CHAVENFE.in_([str(chave).strip() for chave in chaves])
+    except (TypeError, ValueError):
+        return jsonify({"message": "'romaneio' e 'ids' devem ser números inteiros."}), 400
+
+    stmt = update(Entrega).where(filtro)
+    if not incluir_finalizadas:
+        stmt = stmt.where(Entrega.DATAFINALIZACAO.is_(None))
+
+    # Um único UPDATE na mesma transação, sem carregar as entregas.
+    atribuidas = db.session.execute(
+        stmt.values(motorista_id=motorista.id, data_atualizacao=datetime.utcnow())
+        .returning(Entrega.id, Entrega.CHAVENFE)
+        .execution_options(synchronize_session=False)
+    ).all()
+    db.session.commit()
+
+    resposta = {
+        "message": f"{len(atribuidas)} entregas atribuídas ao motorista {motorista.id}.",
+        "atribuidas": len(atribuidas)
+    }
+    if ids is not None:
+        encontrados = {entrega_id for entrega_id, _ in atribuidas}
+        resposta["nao_atribuidas"] = [entrega_id for entrega_id in map(int, ids) if entrega_id not in encontrados]
+    elif chaves is not None:
+        encontradas = {chave for _, chave in atribuidas}
+        resposta["nao_atribuidas"] = [chave for chave in map(lambda c: str(c).strip(), chaves) if chave not in encontradas]
+    return jsonify(resposta), 200
+
 @entrega_bp.route('/', methods=['GET'])
 @jwt_required()
 @role_required(['agente', 'admin'])
+@cache_resposta('entregas', 'motoristas', 'feriados')
 def listar_todas_entregas():
-
-    query = Entrega.query
-
-    status = request.args.get('status')
-    num_nota = request.args.get('num_nota', type=int)
-    transportadora = request.args.get('transportadora')
-    data_inicial_str = request.args.get('data_inicial')
-    data_final_str = request.args.get('data_final')
+    ordenar = request.args.get('ordenar')
     page = request.args.get('page', 1, type=int)
     per_page = request.args.get('per_page', 10, type=int)
-    
-    if status:
-        query = query.filter_by(STATUS=status)
+    modo_cursor = 'after' in request.args
+    after = request.args.get('after')
+    since = request.args.get('since')
+    incluir_total = request.args.get('incluir_total', 'false').lower() == 'true'
 
-    if num_nota:
-        query = query.filter_by(NUMNOTA=num_nota)
-
-    if transportadora:
-        query = query.filter(Entrega.TRANSPORTADORA.ilike(f'%{transportadora}%'))
+    try:
+        serializador = SerializadorEntrega(
+            campos_solicitados(request.args.get('fields')), colunas_extras=('id', 'DTFAT', 'data_atualizacao')
+        )
+        query = filtrar_entregas(Entrega.query, request.args)
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
 
-    if data_inicial_str:
+    if since:
+        if modo_cursor or ordenar:
+            return jsonify({"message": "O parâmetro 'since' não pode ser usado com 'after' ou 'ordenar'."}), 400
         try:
-            data_inicial = datetime.strptime(data_inicial_str, '%Y-%m-%d').date()
-            query = query.filter(Entrega.DTFAT >= data_inicial)
+            linhas, removidos, proximo, tem_mais = consultar_alteracoes(serializador.consulta(query), Entrega, since, per_page)
+        except SincronizacaoExpiradaError as e:
+            return jsonify({"message": str(e)}), 410
         except ValueError:
-            return jsonify({"message": "Formato de data_inicial inválido. Use YYYY-MM-DD."}), 400
+            return jsonify({"message": "Parâmetro 'since' inválido. Use o 'next_since' da resposta anterior ou uma data ISO 8601."}), 400
+        return jsonify(resposta_alteracoes(serializador.serializar(linhas), removidos, proximo, tem_mais)), 200
 
-    if data_final_str:
+    if modo_cursor and ordenar:
+        return jsonify({"message": "O parâmetro 'ordenar' não pode ser usado com 'after'. A paginação por cursor segue DTFAT e id decrescentes."}), 400
+
+    if not modo_cursor:
         try:
-            data_final = datetime.strptime(data_final_str, '%Y-%m-%d').date()
-            data_final_inclusive = data_final + timedelta(days=1)
-            query = query.filter(Entrega.DTFAT < data_final_inclusive)
-        except ValueError:
-            return jsonify({"message": "Formato de data_final inválido. Use YYYY-MM-DD."}), 400
-    
-    pagination = query.paginate(page=page, per_page=per_page, error_out=False)
-    entregas = pagination.items
+            query = ordenar_entregas(query, ordenar)
+        except ValueError as e:
+            return jsonify({"message": str(e)}), 400
+
+    if modo_cursor:
+        # Cada página por cursor é consultada uma única vez; validador aqui só somaria consultas.
+        return listar_entregas_por_cursor(query, serializador, after, per_page, incluir_total)
+
+    # Validador global e indexado, sem COUNT: qualquer gravação muda data_atualizacao
+    # (inclusive linhas que saem do filtro) e exclusões deixam registro em 'exclusoes'.
+    # A situação das entregas em aberto muda na virada do dia sem alterar as linhas.
+    hoje = datetime.combine(date.today(), datetime.min.time())
+    ultima_atualizacao, maior_id, ultima_exclusao = db.session.query(
+        select(db.func.max(Entrega.data_atualizacao)).scalar_subquery(),
+        select(db.func.max(Entrega.id)).scalar_subquery(),
+        select(db.func.max(Exclusao.data_exclusao)).where(Exclusao.tabela == Entrega.__tablename__).scalar_subquery()
+    ).one()
+    ultima_modificacao = max(filter(None, (ultima_atualizacao, ultima_exclusao, hoje)))
+
+    def gerar_resposta():
+        # A resposta não expõe o total; evita o COUNT(*) do paginate.
+        pagination = serializador.consulta(query).paginate(page=page, per_page=per_page, error_out=False, count=False)
+        return jsonify(serializador.serializar(pagination.items)), 200
+
+    return responder_condicional((ultima_atualizacao, maior_id, ultima_exclusao, hoje.date()), ultima_modificacao, gerar_resposta)
+
+@entrega_bp.route('/metricas', methods=['GET'])
+@jwt_required()
+@role_required(['agente', 'admin'])
+def metricas_entregas():
+    filtros = {}
+    for parametro in ('data_inicial', 'data_final'):
+        valor = request.args.get(parametro)
+        if valor:
+            try:
+                filtros[parametro] = datetime.strptime(valor, '%Y-%m-%d').date()
+            except ValueError:
+                return jsonify({"message": f"Formato de {parametro} inválido. Use YYYY-MM-DD."}), 400
+
+    metricas = consultar_metricas(
+        uf=request.args.get('uf'),
+        transportadora=request.args.get('transportadora'),
+        **filtros
+    )
+    return jsonify(metricas), 200
 
-    feriados_adicionais = [
-        date(2025, 11, 20)
-    ]
+@entrega_bp.route('/export', methods=['GET'])
+@jwt_required()
+@role_required(['agente', 'admin'])
+def exportar_entregas():
+    formato = request.args.get('format', 'csv').lower()
+    if formato not in FORMATOS_EXPORTACAO:
+        return jsonify({"message": f"Formato inválido. Use: {', '.join(FORMATOS_EXPORTACAO)}."}), 400
+
+    try:
+        serializador = SerializadorEntrega(campos_solicitados(request.args.get('fields')))
+        query = ordenar_entregas(filtrar_entregas(Entrega.query, request.args), request.args.get('ordenar'))
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+
+    tamanho_lote = current_app.config['EXPORTACAO_TAMANHO_LOTE']
+    nome_arquivo = f"entregas_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{formato}"
+
+    if formato == 'csv':
+        return Response(
+            stream_with_context(gerar_csv(query, serializador, tamanho_lote)),
+            mimetype=FORMATOS_EXPORTACAO['csv'],
+            headers={'Content-Disposition': f'attachment; filename={nome_arquivo}'}
+        )
+
+    caminho = gerar_xlsx(query, serializador, tamanho_lote)
+    response = Response(
+        ler_arquivo(caminho),
+        mimetype=FORMATOS_EXPORTACAO['xlsx'],
+        headers={
+            'Content-Disposition': f'attachment; filename={nome_arquivo}',
+            'Content-Length': str(os.path.getsize(caminho))
+        }
+    )
+    # call_on_close roda mesmo se o cliente desconectar antes do primeiro bloco,
+    # quando o finally de um gerador ainda não iniciado não executaria.
+    response.call_on_close(lambda: remover_arquivo(caminho))
+    return response
+
+
+def listar_entregas_por_cursor(query, serializador: SerializadorEntrega, after: str | None, per_page: int, incluir_total: bool):
+    per_page = max(1, min(per_page, current_app.config['ENTREGAS_MAX_POR_PAGINA']))
+    total = query.order_by(None).count() if incluir_total else None
 
-    entregas_json = []
-    for entrega in entregas:
-        if entrega is not None:
-            entregas_json.append(entrega.to_dict(feriados_customizados=feriados_adicionais))
+    if after:
+        try:
+            dtfat, entrega_id = decodificar_cursor(after, datetime, int)
+        except CursorInvalidoError as e:
+            return jsonify({"message": str(e)}), 400
+        query = query.filter(tuple_(Entrega.DTFAT, Entrega.id) < tuple_(dtfat, entrega_id))
 
-    if not entregas_json:
-        return jsonify([]), 200
+    query = serializador.consulta(query).order_by(Entrega.DTFAT.desc(), Entrega.id.desc())
+    linhas = query.limit(per_page + 1).all()
+    proxima = len(linhas) > per_page
+    linhas = linhas[:per_page]
 
-    return jsonify(entregas_json), 200
+    resposta = {
+        "items": serializador.serializar(linhas),
+        "next_cursor": codificar_cursor(linhas[-1].DTFAT, linhas[-1].id) if proxima else None
+    }
+    if incluir_total:
+        resposta["total"] = total
+    return jsonify(resposta), 200
 
 
 @entrega_bp.route('/<int:entrega_id>/atualizar-rastreamento', methods=['POST'])
 @jwt_required()
 def atualizar_rastreamento_manual(entrega_id):
     try:
-        tarefa_rastreamento_especifico(current_app._get_current_object(), entrega_id)
+        resultado = tarefa_rastreamento_especifico(current_app._get_current_object(), entrega_id)
         
+        if resultado['adiadas']:
+            return jsonify({"mensagem": "A API da transportadora está temporariamente suspensa após falhas seguidas. Tente novamente mais tarde."}), 503
+
         entrega_atualizada = Entrega.query.get(entrega_id)
         if entrega_atualizada:
             return jsonify({
-                "mensagem": "Rastreamento atualizado com sucesso.",
-                "status": entrega_atualizada.status 
+                "mensagem": "Rastreamento atualizado com sucesso." if resultado['rastreadas'] else "Nenhum evento novo retornado pela transportadora.",
+                "status": entrega_atualizada.STATUS,
+                "eventos": resultado['eventos_gravados']
             }), 200
         else:
              return jsonify({"mensagem": "Atualização solicitada, mas a entrega não foi encontrada."}), 404
@@ -429,11 +637,29 @@ def atualizar_rastreamento_manual(entrega_id):
 @entrega_bp.route('/<int:entrega_id>/devolucoes', methods=['GET'])
 @jwt_required()
 def get_devolucoes_por_entrega(entrega_id):
-    devolucoes = Devolucao.query.filter_by(entrega_id=entrega_id).all()
-    return jsonify([d.to_dict() for d in devolucoes])
+    query = Devolucao.query.filter_by(entrega_id=entrega_id)
+    ultima_atualizacao, quantidade, maior_id = query.with_entities(
+        db.func.max(Devolucao.data_atualizacao), db.func.count(Devolucao.id), db.func.max(Devolucao.id)
+    ).one()
+
+    return responder_condicional(
+        (ultima_atualizacao, quantidade, maior_id),
+        ultima_atualizacao,
+        lambda: jsonify([d.to_dict() for d in query.all()])
+    )
 
 @entrega_bp.route('/<int:entrega_id>/rastreamento', methods=['GET'])
 @jwt_required()
 def get_rastreamento_por_entrega(entrega_id):
-    rastreamentos = Rastreamento.query.filter_by(entrega_id=entrega_id).order_by(Rastreamento.timestamp.desc()).all()
-    return jsonify([r.to_dict() for r in rastreamentos])
\ No newline at end of file
+    query = Rastreamento.query.filter_by(entrega_id=entrega_id)
+    # O rastreamento é regravado por inteiro a cada consulta à transportadora,
+    # então o maior id muda sempre que há eventos novos.
+    ultimo_evento, quantidade, maior_id = query.with_entities(
+        db.func.max(Rastreamento.timestamp), db.func.count(Rastreamento.id), db.func.max(Rastreamento.id)
+    ).one()
+
+    return responder_condicional(
+        (ultimo_evento, quantidade, maior_id),
+        None,
+        lambda: jsonify([r.to_dict() for r in query.order_by(Rastreamento.timestamp.desc()).all()])
+    )
\ No newline at end of file
@@ -0,0 +1,113 @@
+from flask import Blueprint, request, jsonify
+from app.extensions import db
+from app.models.feriado import Feriado, FERIADO_ESCOPOS
+from flask_jwt_extended import jwt_required
+from datetime import datetime
+from app.utils.decorators import role_required
+
+feriado_bp = Blueprint('feriados', __name__, url_prefix='/api/feriados')
+
+def aplicar_dados_feriado(feriado: Feriado, data: dict) -> str | None:
+    if 'data' in data:
+        try:
+            feriado.data = datetime.strptime(data['data'], '%Y-%m-%d').date()
+        except (TypeError, ValueError):
+            return "Formato de data inválido. Use YYYY-MM-DD."
+    if 'descricao' in data:
+        feriado.descricao = data['descricao']
+    if 'escopo' in data:
+        feriado.escopo = str(data['escopo']).upper()
+    if 'uf' in data:
+        feriado.uf = str(data['uf']).strip().upper() if data['uf'] else None
+    if 'municipio' in data:
+        feriado.municipio = str(data['municipio']).strip() if data['municipio'] else None
+
+    if not feriado.data or not feriado.descricao:
+        return "Campos 'data' e 'descricao' são obrigatórios."
+    if feriado.escopo not in FERIADO_ESCOPOS:
+        return f"Escopo inválido. Escopos permitidos: {', '.join(FERIADO_ESCOPOS)}."
+    if feriado.escopo == 'NACIONAL':
+        feriado.uf = None
+        feriado.municipio = None
+    elif not feriado.uf:
+        return "Campo 'uf' é obrigatório para feriados estaduais e municipais."
+    if feriado.escopo == 'UF':
+        feriado.municipio = None
+    elif feriado.escopo == 'MUNICIPAL' and not feriado.municipio:
+        return "Campo 'municipio' é obrigatório para feriados municipais."
+    return None
+
+@feriado_bp.route('/', methods=['GET'])
+@jwt_required()
+@role_required(['agente', 'admin'])
+def listar_feriados():
+    query = Feriado.query
+
+    ano = request.args.get('ano', type=int)
+    escopo = request.args.get('escopo')
+    uf = request.args.get('uf')
+
+    if ano:
+        query = query.filter(Feriado.data >= datetime(ano, 1, 1).date(), Feriado.data <= datetime(ano, 12, 31).date())
+    if escopo:
+        query = query.filter_by(escopo=escopo.upper())
+    if uf:
+        query = query.filter_by(uf=uf.upper())
+
+    feriados = query.order_by(Feriado.data).all()
+    return jsonify([feriado.to_dict() for feriado in feriados]), 200
+
+@feriado_bp.route('/', methods=['POST'])
+@jwt_required()
+@role_required(['admin'])
+def cadastrar_feriado():
+    data = request.get_json() or {}
+
+    feriado = Feriado(escopo='NACIONAL')
+    erro = aplicar_dados_feriado(feriado, data)
+    if erro:
+        return jsonify({"message": erro}), 400
+
+    db.session.add(feriado)
+    try:
+        db.session.commit()
+        return jsonify({"message": "Feriado cadastrado com sucesso!", "feriado": feriado.to_dict()}), 201
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"message": f"Erro ao cadastrar feriado: {e}"}), 500
+
+@feriado_bp.route('/<int:feriado_id>', methods=['PATCH'])
+@jwt_required()
+@role_required(['admin'])
+def atualizar_feriado(feriado_id):
+    feriado = Feriado.query.get(feriado_id)
+    if not feriado:
+        return jsonify({"message": "Feriado não encontrado."}), 404
+
+    erro = aplicar_dados_feriado(feriado, request.get_json() or {})
+    if erro:
+        db.session.rollback()
+        return jsonify({"message": erro}), 400
+
+    try:
+        db.session.commit()
+        return jsonify({"message": "Feriado atualizado com sucesso!", "feriado": feriado.to_dict()}), 200
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"message": f"Erro ao atualizar feriado: {e}"}), 500
+
+@feriado_bp.route('/<int:feriado_id>', methods=['DELETE'])
+@jwt_required()
+@role_required(['admin'])
+def remover_feriado(feriado_id):
+    feriado = Feriado.query.get(feriado_id)
+    if not feriado:
+        return jsonify({"message": "Feriado não encontrado."}), 404
+
+    db.session.delete(feriado)
+    try:
+        db.session.commit()
+        return jsonify({"message": "Feriado removido com sucesso!"}), 200
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"message": f"Erro ao remover feriado: {e}"}), 500
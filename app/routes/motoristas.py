@@ -1,14 +1,25 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, current_app, request, jsonify, url_for
 from app.extensions import db
 from app.models.motorista import Motorista
 from app.models.entrega import Entrega
+from app.models.comprovante import Comprovante
+from app.models.devolucao import Devolucao
 from werkzeug.security import generate_password_hash, check_password_hash
 from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity, JWTManager
-from datetime import datetime, date
+from datetime import datetime, date, timedelta
 from app.utils.decorators import role_required
+from app.utils.cache import cache_resposta
+from app.utils.paginacao import CursorInvalidoError, codificar_cursor, decodificar_cursor
+from app.utils.serializacao import SerializadorEntrega, campos_solicitados
 
 motorista_bp = Blueprint('motoristas', __name__, url_prefix='/api/motoristas')
 
+# Só o que o app do motorista exibe; 'fields' pode pedir outros campos da entrega.
+CAMPOS_MANIFESTO = (
+    'id', 'ROMANEIO', 'NUMNOTA', 'CHAVENFE', 'CLIENTE', 'MUNICIPIO', 'UF', 'TELCOM', 'NUMVOLUME', 'TOTPESO',
+    'PREVISAOENTREGA', 'AGENDAMENTO', 'DATAFINALIZACAO', 'DEVOLUCAO', 'STATUS'
+)
+
 @motorista_bp.route('/cadastro', methods=['POST'])
 @jwt_required
 @role_required(['agente', 'admin'])
@@ -64,25 +75,110 @@ def perfil_motorista():
 @jwt_required()
 @role_required(['motorista'])
 def minhas_entregas():
-   
-    motorista_logado_id_str = get_jwt_identity()
-    motorista_logado_id = int(motorista_logado_id_str)
+    # Obsoleto: mantido para versões antigas do app, com a mesma resposta do /manifesto.
+    resposta, status = responder_manifesto()
+    resposta.headers['Deprecation'] = 'true'
+    resposta.headers['Link'] = f'<{url_for("motoristas.manifesto_motorista")}>; rel="successor-version"'
+    return resposta, status
 
-    entregas_atribuidas = Entrega.query.filter_by(motorista_id=motorista_logado_id).all()
+def situacao_comprovantes_devolucoes(entrega_ids: list[int]) -> tuple[dict, dict]:
+    comprovantes = {}
+    devolucoes = {}
+    if not entrega_ids:
+        return comprovantes, devolucoes
 
-    if not entregas_atribuidas:
-        return jsonify({"message": "Nenhuma entrega atribuída a você no momento."}), 404
+    for entrega_id, quantidade, ultimo_envio in db.session.query(
+        Comprovante.entrega_id, db.func.count(Comprovante.id), db.func.max(Comprovante.data_envio)
+    ).filter(Comprovante.entrega_id.in_(entrega_ids)).group_by(Comprovante.entrega_id):
+        comprovantes[entrega_id] = {
+            'quantidade': quantidade,
+            'ultimo_envio': ultimo_envio.isoformat() if ultimo_envio else None
+        }
 
-    feriados_adicionais = [
-        date(2025, 11, 20)
-    ]
-    
+    # Ordenadas da mais antiga para a mais recente: a última gravada no dict vence.
+    for devolucao in Devolucao.query.filter(Devolucao.entrega_id.in_(entrega_ids)).order_by(
+        Devolucao.data_devolucao, Devolucao.id
+    ):
+        devolucoes[devolucao.entrega_id] = {
+            'id': devolucao.id,
+            'status': devolucao.status,
+            'tipo_devolucao': devolucao.tipo_devolucao,
+            'data_devolucao': devolucao.data_devolucao.isoformat() if devolucao.data_devolucao else None
+        }
+
+    return comprovantes, devolucoes
+
+@motorista_bp.route('/manifesto', methods=['GET'])
+@jwt_required()
+@role_required(['motorista'])
+def manifesto_motorista():
+    return responder_manifesto()
+
+def responder_manifesto():
+    # O /api/login emite o token do motorista com o login como identidade.
+    motorista = Motorista.query.filter_by(login=get_jwt_identity()).first()
+    if not motorista:
+        return jsonify({"message": "Motorista não encontrado."}), 404
+
+    romaneio = request.args.get('romaneio', type=int)
+    # Sem romaneio, o padrão é o carregamento de hoje; 'data=todas' amplia para todo o histórico.
+    data_str = request.args.get('data') or (None if romaneio else date.today().isoformat())
+    incluir_finalizadas = request.args.get('incluir_finalizadas', 'false').lower() == 'true'
+    after = request.args.get('after')
+    per_page = request.args.get('per_page', 50, type=int)
+    per_page = max(1, min(per_page, current_app.config['MANIFESTO_MAX_POR_PAGINA']))
+
+    try:
+        serializador = SerializadorEntrega(
+            campos_solicitados(request.args.get('fields')) or CAMPOS_MANIFESTO, colunas_extras=('id',)
+        )
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+
+    query = Entrega.query.filter(Entrega.motorista_id == motorista.id)
+
+    if not incluir_finalizadas:
+        query = query.filter(Entrega.DATAFINALIZACAO.is_(None))
+
+    if romaneio:
+        query = query.filter(Entrega.ROMANEIO == romaneio)
+
+    if data_str and data_str != 'todas':
+        try:
+            data_carregamento = datetime.strptime(data_str, '%Y-%m-%d')
+        except ValueError:
+            return jsonify({"message": "Formato de data inválido. Use YYYY-MM-DD."}), 400
+        query = query.filter(
+            Entrega.DTCARREGAMENTO >= data_carregamento,
+            Entrega.DTCARREGAMENTO < data_carregamento + timedelta(days=1)
+        )
+
+    if after:
+        try:
+            ultimo_id, = decodificar_cursor(after, int)
+        except CursorInvalidoError as e:
+            return jsonify({"message": str(e)}), 400
+        query = query.filter(Entrega.id > ultimo_id)
+
+    linhas = serializador.consulta(query).order_by(Entrega.id).limit(per_page + 1).all()
+    proxima = len(linhas) > per_page
+    linhas = linhas[:per_page]
+
+    comprovantes, devolucoes = situacao_comprovantes_devolucoes([linha.id for linha in linhas])
+    itens = serializador.serializar(linhas)
+    for linha, item in zip(linhas, itens):
+        item['comprovantes'] = comprovantes.get(linha.id, {'quantidade': 0, 'ultimo_envio': None})
+        item['devolucao'] = devolucoes.get(linha.id)
 
-    return jsonify([entrega.to_dict(feriados_customizados=feriados_adicionais) for entrega in entregas_atribuidas]), 200
+    return jsonify({
+        "items": itens,
+        "next_cursor": codificar_cursor(linhas[-1].id) if proxima else None
+    }), 200
 
 @motorista_bp.route('/', methods=['GET'])
 @jwt_required()
 @role_required(['agente', 'admin'])
+@cache_resposta('motoristas')
 def listar_todos_motoristas():
     motoristas = Motorista.query.all()
     if not motoristas:
@@ -0,0 +1,287 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from flask import Flask, Response, make_response, request
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+TIPOS_CACHE = ('memoria', 'redis', 'desativado')
+# Cabeçalhos guardados junto com o corpo, para que a resposta em cache continue
+# atendendo If-None-Match/If-Modified-Since.
+CABECALHOS_CACHE = ('ETag', 'Last-Modified', 'Cache-Control')
+
+
+class CacheMemoria:
+    def __init__(self, max_itens: int):
+        self._lock = threading.Lock()
+        self._itens = OrderedDict()
+        self._versoes = {}
+        self.max_itens = max_itens
+        self.expirados = 0
+        self.removidos_lru = 0
+
+    def obter(self, chave: str) -> bytes | None:
+        with self._lock:
+            item = self._itens.get(chave)
+            if item is None:
+                return None
+            expira_em, valor = item
+            if expira_em <= time.monotonic():
+                del self._itens[chave]
+                self.expirados += 1
+                return None
+            self._itens.move_to_end(chave)
+            return valor
+
+    def gravar(self, chave: str, valor: bytes, ttl: int):
+        with self._lock:
+            self._itens[chave] = (time.monotonic() + ttl, valor)
+            self._itens.move_to_end(chave)
+            while len(self._itens) > self.max_itens:
+                self._itens.popitem(last=False)
+                self.removidos_lru += 1
+
+    def versoes(self, namespaces: tuple[str, ...]) -> list[int]:
+        return [self._versoes.get(namespace, 0) for namespace in namespaces]
+
+    def incrementar_versoes(self, namespaces):
+        with self._lock:
+            for namespace in namespaces:
+                self._versoes[namespace] = self._versoes.get(namespace, 0) + 1
+
+    def estatisticas(self) -> dict:
+        return {
+            'itens': len(self._itens),
+            'max_itens': self.max_itens,
+            'expirados': self.expirados,
+            'removidos_lru': self.removidos_lru
+        }
+
+
+class CacheRedis:
+    # Funciona com qualquer servidor compatível com o protocolo do Redis
+    # (Redis, Valkey, KeyDB), inclusive uma instância local para desenvolvimento.
+    # A remoção por LRU fica a cargo do servidor (maxmemory-policy allkeys-lru).
+    def __init__(self, url: str, prefixo: str):
+        self._cliente = redis.Redis.from_url(url, socket_timeout=1, socket_connect_timeout=1)
+        self._prefixo = prefixo
+
+    def _chave_versao(self, namespace: str) -> str:
+        return f'{self._prefixo}:versao:{namespace}'
+
+    def obter(self, chave: str) -> bytes | None:
+        return self._cliente.get(f'{self._prefixo}:{chave}')
+
+    def gravar(self, chave: str, valor: bytes, ttl: int):
+        self._cliente.set(f'{self._prefixo}:{chave}', valor, ex=ttl)
+
+    def versoes(self, namespaces: tuple[str, ...]) -> list[int]:
+        return [int(versao or 0) for versao in self._cliente.mget([self._chave_versao(ns) for ns in namespaces])]
+
+    def incrementar_versoes(self, namespaces):
+        pipeline = self._cliente.pipeline(transaction=False)
+        for namespace in namespaces:
+            pipeline.incr(self._chave_versao(namespace))
+        pipeline.execute()
+
+    def estatisticas(self) -> dict:
+        info = self._cliente.info('memory')
+        return {
+            'itens': self._cliente.dbsize(),
+            'memoria_usada': info.get('used_memory_human'),
+            'politica_remocao': info.get('maxmemory_policy')
+        }
+
+
+class CacheRespostas:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._backend = None
+        self.tipo = 'desativado'
+        self.ttl_padrao = 60
+        self._contadores = {}
+        self._invalidacoes = {}
+        self._erros = 0
+
+    def configurar(self, app: Flask):
+        tipo = app.config['CACHE_TIPO']
+        if tipo not in TIPOS_CACHE:
+            raise ValueError(f"CACHE_TIPO inválido: {tipo}. Use um de: {', '.join(TIPOS_CACHE)}.")
+
+        self.ttl_padrao = app.config['CACHE_TTL_SEGUNDOS']
+        if tipo == 'redis':
+            if redis is None:
+                print("[CACHE] Pacote 'redis' não instalado. Usando cache em memória.")
+                tipo = 'memoria'
+            else:
+                self._backend = CacheRedis(app.config['CACHE_REDIS_URL'], app.config['CACHE_PREFIXO'])
+        if tipo == 'memoria':
+            self._backend = CacheMemoria(app.config['CACHE_MAX_ITENS'])
+        if tipo == 'desativado':
+            self._backend = None
+        self.tipo = tipo
+
+    @property
+    def ativo(self) -> bool:
+        return self._backend is not None
+
+    def _registrar(self, namespace: str, campo: str):
+        with self._lock:
+            contador = self._contadores.setdefault(namespace, {'acertos': 0, 'faltas': 0})
+            contador[campo] += 1
+
+    def _falha(self, operacao: str, erro: Exception):
+        with self._lock:
+            self._erros += 1
+        # Cache indisponível não pode derrubar a rota: segue direto para o banco.
+        print(f"[CACHE] Falha ao {operacao}: {erro}")
+
+    def chave(self, namespace: str, dependencias: tuple[str, ...]) -> str | None:
+        try:
+            versoes = self._backend.versoes(dependencias)
+        except Exception as e:
+            self._falha('ler versões', e)
+            return None
+        assinatura = '.'.join(str(versao) for versao in versoes)
+        caminho = hashlib.sha1(request.full_path.encode('utf-8')).hexdigest()
+        return f'{namespace}:{assinatura}:{caminho}'
+
+    def obter(self, namespace: str, chave: str) -> Response | None:
+        try:
+            valor = self._backend.obter(chave)
+        except Exception as e:
+            self._falha('ler', e)
+            valor = None
+
+        if valor is None:
+            self._registrar(namespace, 'faltas')
+            return None
+
+        self._registrar(namespace, 'acertos')
+        cabecalho, corpo = valor.split(b'\n', 1)
+        metadados = json.loads(cabecalho)
+        return Response(corpo, status=metadados['status'], headers=metadados['headers'], mimetype=metadados['mimetype'])
+
+    def gravar(self, chave: str, response: Response, ttl: int | None = None):
+        metadados = {
+            'status': response.status_code,
+            'mimetype': response.mimetype,
+            'headers': {nome: response.headers[nome] for nome in CABECALHOS_CACHE if nome in response.headers}
+        }
+        valor = json.dumps(metadados).encode('utf-8') + b'\n' + response.get_data()
+        try:
+            self._backend.gravar(chave, valor, ttl or self.ttl_padrao)
+        except Exception as e:
+            self._falha('gravar', e)
+
+    def invalidar(self, *namespaces: str):
+        if not self.ativo or not namespaces:
+            return
+        # As chaves incluem a versão de cada namespace; incrementar a versão torna
+        # as respostas antigas inalcançáveis e elas saem por TTL/LRU.
+        try:
+            self._backend.incrementar_versoes(namespaces)
+        except Exception as e:
+            self._falha('invalidar', e)
+            return
+        with self._lock:
+            for namespace in namespaces:
+                self._invalidacoes[namespace] = self._invalidacoes.get(namespace, 0) + 1
+
+    def estatisticas(self) -> dict:
+        acertos = sum(c['acertos'] for c in self._contadores.values())
+        faltas = sum(c['faltas'] for c in self._contadores.values())
+        try:
+            backend = self._backend.estatisticas() if self.ativo else None
+        except Exception as e:
+            self._falha('ler estatísticas', e)
+            backend = None
+        return {
+            'tipo': self.tipo,
+            'ttl_segundos': self.ttl_padrao,
+            'acertos': acertos,
+            'faltas': faltas,
+            'taxa_acerto': round(acertos / (acertos + faltas), 4) if acertos + faltas else None,
+            'por_namespace': {
+                namespace: {**contador, 'invalidacoes': self._invalidacoes.get(namespace, 0)}
+                for namespace, contador in self._contadores.items()
+            },
+            'invalidacoes': dict(self._invalidacoes),
+            'erros': self._erros,
+            'backend': backend
+        }
+
+
+cache = CacheRespostas()
+
+
+def cache_resposta(namespace: str, *dependencias: str, ttl: int | None = None):
+    # A chave usa a URL completa (rota + filtros) e as versões do namespace e de
+    # cada dependência; uma escrita em qualquer uma delas invalida a resposta.
+    namespaces = (namespace,) + dependencias
+
+    def wrapper(fn):
+        @wraps(fn)
+        def decorator(*args, **kwargs):
+            if not cache.ativo:
+                return fn(*args, **kwargs)
+
+            chave = cache.chave(namespace, namespaces)
+            if chave is None:
+                return fn(*args, **kwargs)
+
+            response = cache.obter(namespace, chave)
+            if response is not None:
+                return response.make_conditional(request)
+
+            response = fn(*args, **kwargs)
+            if not isinstance(response, Response):
+                response = make_response(response)
+            # Só respostas completas entram no cache (304 e erros não).
+            if response.status_code == 200 and not response.direct_passthrough:
+                cache.gravar(chave, response, ttl)
+            return response
+        return decorator
+    return wrapper
+
+
+def _tabela(objeto) -> str | None:
+    return getattr(objeto, '__tablename__', None)
+
+
+@event.listens_for(Session, 'after_flush')
+def _marcar_tabelas_alteradas(sessao, contexto):
+    tabelas = {_tabela(objeto) for objeto in (*sessao.new, *sessao.dirty, *sessao.deleted)}
+    tabelas.discard(None)
+    if tabelas:
+        sessao.info.setdefault('cache_tabelas', set()).update(tabelas)
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _marcar_tabelas_em_lote(estado):
+    # Upserts, update() em lote e query.delete() não passam pelo flush.
+    if not (estado.is_insert or estado.is_update or estado.is_delete):
+        return
+    tabela = getattr(estado.statement, 'table', None)
+    if tabela is not None:
+        estado.session.info.setdefault('cache_tabelas', set()).add(tabela.name)
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidar_cache_apos_commit(sessao):
+    tabelas = sessao.info.pop('cache_tabelas', None)
+    if tabelas:
+        cache.invalidar(*sorted(tabelas))
+
+
+@event.listens_for(Session, 'after_rollback')
+def _descartar_tabelas_alteradas(sessao):
+    sessao.info.pop('cache_tabelas', None)
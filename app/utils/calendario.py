@@ -0,0 +1,246 @@
+import threading
+import unicodedata
+import numpy as np
+from datetime import date, datetime
+from workalendar.america import Brazil
+
+# Segunda a sexta, igual aos dias de fim de semana do workalendar.
+SEMANA_UTIL = '1111100'
+MAX_CALENDARIOS_EM_CACHE = 128
+
+
+def _como_dias(datas) -> np.ndarray:
+    return np.asarray(datas, dtype='datetime64[us]').astype('datetime64[D]')
+
+
+def _ano(dia: np.datetime64) -> int:
+    return int(dia.astype('datetime64[Y]').astype(int)) + 1970
+
+
+def normalizar_localidade(valor: str | None) -> str | None:
+    if not valor:
+        return None
+    sem_acentos = unicodedata.normalize('NFKD', str(valor)).encode('ascii', 'ignore').decode('ascii')
+    return ' '.join(sem_acentos.upper().split()) or None
+
+
+class CalendarioFeriados:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._anos = frozenset()
+        self._feriados = np.array([], dtype='datetime64[D]')
+        self._calendarios = {}
+        self._cadastrados = None
+        self._acertos = 0
+        self._faltas = 0
+        self._recalculos = 0
+        self._recargas_cadastrados = 0
+
+    def configurar(self, ano_inicial: int, ano_final: int):
+        self._garantir_anos(ano_inicial, ano_final)
+
+    def _garantir_anos(self, ano_inicial: int, ano_final: int):
+        if all(ano in self._anos for ano in range(ano_inicial, ano_final + 1)):
+            return
+
+        with self._lock:
+            faltantes = [ano for ano in range(ano_inicial, ano_final + 1) if ano not in self._anos]
+            if not faltantes:
+                return
+            cal = Brazil()
+            novos = [dia for ano in faltantes for dia, _ in cal.holidays(ano)]
+            self._feriados = np.union1d(self._feriados, np.array(novos, dtype='datetime64[D]'))
+            self._anos = self._anos | frozenset(faltantes)
+            self._calendarios = {}
+            self._recalculos += 1
+
+    def invalidar_feriados_cadastrados(self):
+        with self._lock:
+            self._cadastrados = None
+            self._calendarios = {}
+
+    def _feriados_cadastrados(self) -> dict:
+        cadastrados = self._cadastrados
+        if cadastrados is not None:
+            return cadastrados
+
+        from sqlalchemy import select
+        from app.extensions import db
+        from app.models.feriado import Feriado
+
+        with self._lock:
+            if self._cadastrados is not None:
+                return self._cadastrados
+
+            indice = {'nacionais': set(), 'uf': {}, 'municipio': {}}
+            try:
+                # Conexão própria: quem chama pode estar no meio de um flush, e um erro
+                # aqui não pode abortar a transação dele.
+                with db.engine.connect() as conexao:
+                    linhas = conexao.execute(
+                        select(Feriado.data, Feriado.escopo, Feriado.uf, Feriado.municipio)
+                    ).all()
+            except Exception as e:
+                # Sem guardar o índice vazio: a próxima chamada tenta carregar de novo.
+                print(f"Erro ao carregar feriados cadastrados. Usando apenas feriados nacionais: {e}")
+                return indice
+
+            for data, escopo, uf, municipio in linhas:
+                uf = normalizar_localidade(uf)
+                if escopo == 'MUNICIPAL' and uf and municipio:
+                    indice['municipio'].setdefault((uf, normalizar_localidade(municipio)), set()).add(data)
+                elif escopo == 'UF' and uf:
+                    indice['uf'].setdefault(uf, set()).add(data)
+                else:
+                    indice['nacionais'].add(data)
+
+            self._cadastrados = indice
+            self._calendarios = {}
+            self._recargas_cadastrados += 1
+            return indice
+
+    def feriados_localidade(self, uf: str | None = None, municipio: str | None = None) -> set[date]:
+        indice = self._feriados_cadastrados()
+        feriados = set(indice['nacionais'])
+        uf = normalizar_localidade(uf)
+        if uf:
+            feriados |= indice['uf'].get(uf, set())
+            municipio = normalizar_localidade(municipio)
+            if municipio:
+                feriados |= indice['municipio'].get((uf, municipio), set())
+        return feriados
+
+    def calendario(self, ano_inicial: int, ano_final: int, feriados_extras: list[date] = None,
+                   uf: str | None = None, municipio: str | None = None) -> np.busdaycalendar:
+        self._garantir_anos(ano_inicial, ano_final)
+        uf = normalizar_localidade(uf)
+        municipio = normalizar_localidade(municipio) if uf else None
+        extras = tuple(sorted(set(feriados_extras))) if feriados_extras else None
+        chave = (uf, municipio, extras)
+
+        calendario = self._calendarios.get(chave)
+        if calendario is not None:
+            self._acertos += 1
+            return calendario
+
+        self._faltas += 1
+        adicionais = self.feriados_localidade(uf, municipio) | set(extras or ())
+        feriados = self._feriados
+        if adicionais:
+            feriados = np.union1d(feriados, np.array(sorted(adicionais), dtype='datetime64[D]'))
+        calendario = np.busdaycalendar(weekmask=SEMANA_UTIL, holidays=feriados)
+
+        if self._cadastrados is None:
+            # Feriados cadastrados não carregaram: não guarda um calendário incompleto.
+            return calendario
+        with self._lock:
+            if len(self._calendarios) >= MAX_CALENDARIOS_EM_CACHE:
+                self._calendarios = {}
+            self._calendarios[chave] = calendario
+        return calendario
+
+    def _grupos_localidade(self, tamanho: int, ufs, municipios):
+        if ufs is None:
+            yield None, None, np.ones(tamanho, dtype=bool)
+            return
+
+        ufs = [normalizar_localidade(uf) for uf in ufs]
+        municipios = [normalizar_localidade(m) for m in municipios] if municipios is not None else [None] * tamanho
+        chaves = np.array([f"{uf or ''}|{municipio or ''}" for uf, municipio in zip(ufs, municipios)], dtype=object)
+        for chave in np.unique(chaves):
+            uf, municipio = chave.split('|', 1)
+            yield uf or None, municipio or None, chaves == chave
+
+    def add_working_days_lote(self, datas, dias, feriados_extras: list[date] = None, ufs=None, municipios=None) -> np.ndarray:
+        inicios = _como_dias(datas)
+        dias = np.asarray(dias, dtype='float64')
+        resultado = np.full(inicios.shape, np.datetime64('NaT'), dtype='datetime64[D]')
+
+        validas = ~np.isnat(inicios) & ~np.isnan(dias) & (dias >= 0)
+        if not validas.any():
+            return resultado
+
+        for uf, municipio, grupo in self._grupos_localidade(len(inicios), ufs, municipios):
+            selecao = validas & grupo
+            if not selecao.any():
+                continue
+            inicios_validos = inicios[selecao]
+            dias_validos = dias[selecao].astype('int64')
+            anos_extras = int(dias_validos.max()) // 250 + 1
+            calendario = self.calendario(
+                _ano(inicios_validos.min()), _ano(inicios_validos.max()) + anos_extras,
+                feriados_extras, uf, municipio
+            )
+
+            # roll='backward' reproduz o add_working_days do workalendar: a contagem
+            # começa no dia seguinte à data inicial, mesmo que ela não seja útil.
+            deslocadas = np.busday_offset(inicios_validos, dias_validos, roll='backward', busdaycal=calendario)
+            resultado[selecao] = np.where(dias_validos == 0, inicios_validos, deslocadas)
+        return resultado
+
+    def working_days_between_lote(self, inicios, fins, feriados_extras: list[date] = None, ufs=None, municipios=None) -> np.ndarray:
+        inicios = _como_dias(inicios)
+        fins = _como_dias(fins)
+        resultado = np.zeros(inicios.shape, dtype='int64')
+
+        validas = ~np.isnat(inicios) & ~np.isnat(fins)
+        if not validas.any():
+            return resultado
+
+        um_dia = np.timedelta64(1, 'D')
+        for uf, municipio, grupo in self._grupos_localidade(len(inicios), ufs, municipios):
+            selecao = validas & grupo
+            if not selecao.any():
+                continue
+            menores = np.minimum(inicios[selecao], fins[selecao])
+            maiores = np.maximum(inicios[selecao], fins[selecao])
+            calendario = self.calendario(_ano(menores.min()), _ano(maiores.max()), feriados_extras, uf, municipio)
+
+            # Mesmo intervalo do get_working_days_delta: exclui o início e inclui o fim.
+            resultado[selecao] = np.busday_count(menores + um_dia, maiores + um_dia, busdaycal=calendario)
+        return resultado
+
+    def add_working_days(self, data: date, dias: int, feriados_extras: list[date] = None,
+                         uf: str | None = None, municipio: str | None = None) -> date | None:
+        resultado = self.add_working_days_lote([data], [dias], feriados_extras, [uf], [municipio])[0]
+        return None if np.isnat(resultado) else resultado.astype(object)
+
+    def working_days_between(self, inicio: date, fim: date, feriados_extras: list[date] = None,
+                             uf: str | None = None, municipio: str | None = None) -> int:
+        return int(self.working_days_between_lote([inicio], [fim], feriados_extras, [uf], [municipio])[0])
+
+    def estatisticas(self) -> dict:
+        consultas = self._acertos + self._faltas
+        cadastrados = self._cadastrados
+        return {
+            'anos_carregados': sorted(self._anos),
+            'total_feriados': int(len(self._feriados)),
+            'calendarios_em_cache': len(self._calendarios),
+            'acertos': self._acertos,
+            'faltas': self._faltas,
+            'taxa_acerto': round(self._acertos / consultas, 4) if consultas else None,
+            'recalculos_feriados': self._recalculos,
+            'recargas_feriados_cadastrados': self._recargas_cadastrados,
+            'feriados_cadastrados': {
+                'nacionais': len(cadastrados['nacionais']),
+                'ufs': len(cadastrados['uf']),
+                'municipios': len(cadastrados['municipio'])
+            } if cadastrados is not None else None
+        }
+
+
+calendario = CalendarioFeriados()
+
+
+def calcular_previsoes_entrega(datas_carregamento, prazos, feriados_customizados: list[date] = None,
+                               ufs=None, municipios=None) -> list[datetime | None]:
+    resultado = calendario.add_working_days_lote(datas_carregamento, prazos, feriados_customizados, ufs, municipios)
+    return [
+        datetime.combine(dia, datetime.min.time()) if dia is not None else None
+        for dia in resultado.astype(object)
+    ]
+
+
+def calcular_previsao_entrega(data_carregamento: date, prazo: int, feriados_customizados: list[date] = None,
+                              uf: str | None = None, municipio: str | None = None) -> datetime | None:
+    return calcular_previsoes_entrega([data_carregamento], [prazo], feriados_customizados, [uf], [municipio])[0]
@@ -0,0 +1,33 @@
+from flask import Flask, current_app, g, has_app_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+def _contar_consulta(conn, cursor, statement, parameters, context, executemany):
+    if has_app_context() and 'sql_consultas' in g:
+        g.sql_consultas += 1
+
+
+def registrar_contador_sql(app: Flask):
+    # O modo debug só é ligado depois, em app.run(debug=True); por isso a decisão é por requisição.
+    if not event.contains(Engine, 'before_cursor_execute', _contar_consulta):
+        event.listen(Engine, 'before_cursor_execute', _contar_consulta)
+
+    @app.before_request
+    def _iniciar_contagem_sql():
+        if current_app.debug or current_app.config.get('SQL_CONTAR_CONSULTAS'):
+            g.sql_consultas = 0
+
+    @app.after_request
+    def _registrar_contagem_sql(response):
+        consultas = g.pop('sql_consultas', None)
+        if consultas is None:
+            return response
+
+        limite = current_app.config['SQL_LIMITE_CONSULTAS_POR_REQUISICAO']
+        response.headers['X-SQL-Consultas'] = str(consultas)
+        if consultas > limite:
+            print(f"[SQL] {request.method} {request.path}: {consultas} consultas (limite {limite}). Verifique consultas N+1.")
+        else:
+            print(f"[SQL] {request.method} {request.path}: {consultas} consultas.")
+        return response
@@ -0,0 +1,74 @@
+import csv
+import io
+import os
+import tempfile
+from openpyxl import Workbook
+from app.utils.serializacao import SerializadorEntrega
+
+FORMATOS_EXPORTACAO = {
+    'csv': 'text/csv; charset=utf-8',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+}
+
+
+def iterar_lotes(query, serializador: SerializadorEntrega, tamanho_lote: int):
+    # yield_per usa cursor do lado do servidor no PostgreSQL (stream_results),
+    # então só um lote de linhas fica em memória por vez.
+    lote = []
+    for linha in serializador.consulta(query).yield_per(tamanho_lote):
+        lote.append(linha)
+        if len(lote) >= tamanho_lote:
+            yield serializador.serializar(lote)
+            lote = []
+    if lote:
+        yield serializador.serializar(lote)
+
+
+def gerar_csv(query, serializador: SerializadorEntrega, tamanho_lote: int):
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer)
+
+    escritor.writerow(serializador.campos)
+    yield buffer.getvalue()
+
+    for registros in iterar_lotes(query, serializador, tamanho_lote):
+        buffer.seek(0)
+        buffer.truncate()
+        for registro in registros:
+            escritor.writerow(registro.values())
+        yield buffer.getvalue()
+
+
+def gerar_xlsx(query, serializador: SerializadorEntrega, tamanho_lote: int) -> str:
+    workbook = Workbook(write_only=True)
+    planilha = workbook.create_sheet('Entregas')
+    planilha.append(list(serializador.campos))
+
+    for registros in iterar_lotes(query, serializador, tamanho_lote):
+        for registro in registros:
+            planilha.append(list(registro.values()))
+
+    descritor, caminho = tempfile.mkstemp(suffix='.xlsx')
+    os.close(descritor)
+    try:
+        workbook.save(caminho)
+    except Exception:
+        os.remove(caminho)
+        raise
+    return caminho
+
+
+def ler_arquivo(caminho: str, tamanho_bloco: int = 64 * 1024):
+    with open(caminho, 'rb') as arquivo:
+        while True:
+            bloco = arquivo.read(tamanho_bloco)
+            if not bloco:
+                break
+            yield bloco
+
+
+def remover_arquivo(caminho: str):
+    try:
+        os.remove(caminho)
+    except FileNotFoundError:
+        pass
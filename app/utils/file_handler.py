@@ -3,6 +3,7 @@ import os
 from werkzeug.utils import secure_filename
 from flask import current_app
 from ..extensions import db
+from ..clients.transporte import transporte
 
 def baixar_e_salvar_comprovante(entrega_id: int, url_comprovante: str):
 
@@ -16,7 +17,7 @@ def baixar_e_salvar_comprovante(entrega_id: int, url_comprovante: str):
             print(f"Comprovante para a entrega {entrega_id} já existe.")
             return None
 
-        response = requests.get(url_comprovante, stream=True, timeout=20)
+        response = transporte.get(url_comprovante, stream=True)
         response.raise_for_status()
 
         base_filename = os.path.basename(url_comprovante).split('?')[0]
@@ -0,0 +1,43 @@
+import hashlib
+from datetime import datetime, timezone
+from flask import make_response, request
+
+
+def gerar_etag(*partes) -> str:
+    bruto = '|'.join(str(parte) for parte in partes).encode('utf-8')
+    return hashlib.sha1(bruto).hexdigest()
+
+
+def _como_utc(valor: datetime | None) -> datetime | None:
+    if valor is None:
+        return None
+    # data_atualizacao é gravada como UTC sem fuso; o cabeçalho HTTP só tem segundos.
+    return valor.replace(tzinfo=timezone.utc, microsecond=0) if valor.tzinfo is None else valor.replace(microsecond=0)
+
+
+def nao_modificado(etag: str, ultima_modificacao: datetime | None = None) -> bool:
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+    if request.if_modified_since and ultima_modificacao is not None:
+        return _como_utc(ultima_modificacao) <= request.if_modified_since
+    return False
+
+
+def responder_condicional(validador: tuple, ultima_modificacao: datetime | None, gerar_resposta):
+    # O ETag inclui a query string: a mesma coleção com outros filtros, página ou
+    # campos é outra representação.
+    etag = gerar_etag(request.full_path, *validador)
+
+    if nao_modificado(etag, ultima_modificacao):
+        response = make_response('', 304)
+    else:
+        response = make_response(gerar_resposta())
+        if response.status_code != 200:
+            return response
+
+    response.set_etag(etag, weak=True)
+    if ultima_modificacao is not None:
+        response.last_modified = _como_utc(ultima_modificacao)
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
@@ -0,0 +1,241 @@
+import time
+import pandas as pd
+from datetime import datetime
+from openpyxl import load_workbook
+from sqlalchemy.dialects import postgresql, sqlite
+from flask import current_app
+from app.extensions import db
+from app.models.entrega import Entrega
+from app.utils.calendario import calcular_previsoes_entrega
+from app.utils.indicadores import materializar_por_chaves
+
+COLUNAS_OBRIGATORIAS_IMPORTACAO = [
+    "CODFILIAL", "DTFAT", "DTCARREGAMENTO", "ROMANEIO", "TIPOVENDA",
+    "NUMNOTA", "NUMPED", "CODCLI", "CLIENTE", "MUNICIPIO", "UF",
+    "VLTOTAL", "NUMVOLUME", "TOTPESO", "PRAZOENTREGA", "CHAVENFE",
+    "CODFORNECFRETE", "TRANSPORTADORA"
+]
+
+COLUNAS_INTEIRAS = ["CODFILIAL", "ROMANEIO", "TIPOVENDA", "NUMNOTA", "NUMPED", "CODCLI", "NUMVOLUME", "PRAZOENTREGA", "CODFORNECFRETE"]
+COLUNAS_DECIMAIS = ["VLTOTAL", "TOTPESO"]
+COLUNAS_DATAS = ["DTFAT", "DTCARREGAMENTO"]
+COLUNAS_TEXTO = ["CLIENTE", "MUNICIPIO", "UF", "CHAVENFE", "TRANSPORTADORA"]
+COLUNAS_OPCIONAIS_TEXTO = ["EMAIL", "TELCOM", "EMAIL_1", "VENDEDOR"]
+COLUNAS_OPCIONAIS_DATAS = ["DATAFINALIZACAO", "AGENDAMENTO"]
+
+# Limite de parâmetros por cláusula IN, compatível com SQLite e PostgreSQL.
+TAMANHO_CONSULTA_CHAVES = 900
+
+
+class ColunasFaltantesError(ValueError):
+    def __init__(self, colunas: list[str]):
+        self.colunas = colunas
+        super().__init__(f"Arquivo não possui todas as colunas obrigatórias. Faltando: {', '.join(colunas)}")
+
+
+def colunas_faltantes(colunas) -> list[str]:
+    return [col for col in COLUNAS_OBRIGATORIAS_IMPORTACAO if col not in colunas]
+
+
+def fatiar_dataframe(df: pd.DataFrame, tamanho_lote: int):
+    for posicao in range(0, len(df), tamanho_lote):
+        yield df.iloc[posicao:posicao + tamanho_lote]
+
+
+def ler_blocos_csv(stream, tamanho_lote: int):
+    leitor = pd.read_csv(stream, dtype={'CHAVENFE': str}, encoding='utf-8', chunksize=tamanho_lote)
+    with leitor:
+        for bloco in leitor:
+            yield bloco
+
+
+def ler_blocos_xlsx(arquivo, tamanho_lote: int):
+    workbook = load_workbook(arquivo, read_only=True, data_only=True)
+    try:
+        linhas = workbook.active.iter_rows(values_only=True)
+        cabecalho = next(linhas, None)
+        if cabecalho is None:
+            return
+        cabecalho = [str(col).strip() if col is not None else '' for col in cabecalho]
+        total_colunas = len(cabecalho)
+
+        bloco = []
+        for linha in linhas:
+            if not any(valor is not None for valor in linha):
+                continue
+            bloco.append(linha[:total_colunas])
+            if len(bloco) >= tamanho_lote:
+                yield pd.DataFrame(bloco, columns=cabecalho)
+                bloco = []
+        if bloco:
+            yield pd.DataFrame(bloco, columns=cabecalho)
+    finally:
+        workbook.close()
+
+
+def _datas_nativas(serie: pd.Series) -> pd.Series:
+    datas = pd.Series(serie.array.to_pydatetime(), index=serie.index, dtype=object)
+    return datas.where(serie.notna(), None)
+
+
+def preparar_lote(df: pd.DataFrame, linha_inicial: int = 2) -> tuple[list[dict], list[dict]]:
+    df = df.reset_index(drop=True)
+    convertido = pd.DataFrame(index=df.index)
+
+    for col in COLUNAS_INTEIRAS:
+        convertido[col] = pd.to_numeric(df[col], errors='coerce')
+    for col in COLUNAS_DECIMAIS:
+        convertido[col] = pd.to_numeric(df[col], errors='coerce')
+    for col in COLUNAS_DATAS:
+        convertido[col] = pd.to_datetime(df[col], errors='coerce')
+    for col in COLUNAS_TEXTO:
+        convertido[col] = df[col].where(df[col].notna(), None).map(lambda v: str(v).strip() if v is not None else None)
+        convertido.loc[convertido[col] == '', col] = None
+
+    invalidas = convertido[COLUNAS_OBRIGATORIAS_IMPORTACAO].isna()
+    rejeitadas = []
+    mascara_rejeitadas = invalidas.any(axis=1)
+    for indice in mascara_rejeitadas[mascara_rejeitadas].index:
+        campos = [col for col in COLUNAS_OBRIGATORIAS_IMPORTACAO if invalidas.at[indice, col]]
+        rejeitadas.append({
+            "linha": int(indice) + linha_inicial,
+            "motivo": f"Valores ausentes ou inválidos: {', '.join(campos)}"
+        })
+
+    validas = ~mascara_rejeitadas
+    convertido = convertido[validas]
+    df = df[validas]
+
+    for col in COLUNAS_INTEIRAS:
+        convertido[col] = convertido[col].astype('int64')
+    convertido['PREVISAOENTREGA'] = calcular_previsoes_entrega(
+        convertido['DTCARREGAMENTO'], convertido['PRAZOENTREGA'],
+        ufs=convertido['UF'].tolist(), municipios=convertido['MUNICIPIO'].tolist()
+    )
+    for col in COLUNAS_DATAS + ['PREVISAOENTREGA']:
+        convertido[col] = _datas_nativas(pd.to_datetime(convertido[col]))
+
+    for col in COLUNAS_OPCIONAIS_TEXTO:
+        if col in df.columns:
+            convertido[col] = df[col].where(df[col].notna(), None).map(lambda v: str(v) if v is not None else None)
+    for col in COLUNAS_OPCIONAIS_DATAS:
+        if col in df.columns:
+            convertido[col] = _datas_nativas(pd.to_datetime(df[col], errors='coerce'))
+
+    convertido = convertido.drop_duplicates(subset='CHAVENFE', keep='last')
+    return convertido.to_dict('records'), rejeitadas
+
+
+def _insert_dialeto():
+    if db.engine.dialect.name == 'postgresql':
+        return postgresql.insert
+    return sqlite.insert
+
+
+def upsert_entregas(registros: list[dict], colunas_atualizaveis: list[str] | None = None, atualizar: bool = True) -> set[str]:
+    # Devolve as CHAVENFE inseridas agora; as demais já existiam (atualizadas ou ignoradas).
+    if not registros:
+        return set()
+
+    tabela = Entrega.__table__
+    stmt = _insert_dialeto()(tabela)
+
+    if colunas_atualizaveis is None:
+        colunas_atualizaveis = current_app.config['ENTREGAS_UPSERT_COLUNAS']
+    # Só entram as colunas presentes no arquivo; as ausentes mantêm o valor gravado,
+    # e as presentes mas vazias limpam o campo (ex.: finalização corrigida).
+    colunas = [col for col in colunas_atualizaveis if col in registros[0] and col != 'CHAVENFE']
+
+    agora = datetime.utcnow()
+    if atualizar and colunas:
+        set_ = {tabela.c[col]: stmt.excluded[col] for col in colunas}
+        set_[tabela.c.data_atualizacao] = agora
+        stmt = stmt.on_conflict_do_update(index_elements=[tabela.c.CHAVENFE], set_=set_)
+    else:
+        stmt = stmt.on_conflict_do_nothing(index_elements=[tabela.c.CHAVENFE])
+
+    # data_criacao não é atualizada no conflito: só as linhas inseridas voltam com o 'agora' deste lote.
+    stmt = stmt.returning(tabela.c.CHAVENFE, tabela.c.data_criacao)
+    linhas = db.session.execute(stmt, [{**registro, 'data_criacao': agora} for registro in registros])
+    return {chave for chave, data_criacao in linhas if data_criacao == agora}
+
+
+def importar_lote(df: pd.DataFrame, numero_lote: int, linha_inicial: int = 2, atualizar: bool = True) -> dict:
+    inicio = time.perf_counter()
+    registros, rejeitadas = preparar_lote(df, linha_inicial)
+
+    chaves = [r['CHAVENFE'] for r in registros]
+    inseridas = len(upsert_entregas(registros, atualizar=atualizar))
+    materializar_por_chaves(chaves)
+
+    atualizadas = len(registros) - inseridas if atualizar else 0
+    return {
+        "lote": numero_lote,
+        "linhas": len(df),
+        "inseridas": inseridas,
+        "atualizadas": atualizadas,
+        "ignoradas": len(df) - inseridas - atualizadas - len(rejeitadas),
+        "rejeitadas": len(rejeitadas),
+        "erros": rejeitadas,
+        "tempo_ms": round((time.perf_counter() - inicio) * 1000, 1)
+    }
+
+
+def importar_blocos(blocos, ao_concluir_lote=None, atualizar: bool = True) -> dict:
+    max_erros = current_app.config['IMPORTACAO_MAX_ERROS_REPORTADOS']
+    inicio = time.perf_counter()
+    lotes = []
+    erros = []
+    linha_inicial = 2
+
+    for numero_lote, bloco in enumerate(blocos, start=1):
+        if numero_lote == 1:
+            faltantes = colunas_faltantes(bloco.columns)
+            if faltantes:
+                raise ColunasFaltantesError(faltantes)
+
+        resultado_lote = importar_lote(bloco, numero_lote, linha_inicial, atualizar)
+        erros_lote = resultado_lote.pop('erros')
+        erros.extend(erros_lote[:max_erros - len(erros)])
+        lotes.append(resultado_lote)
+        linha_inicial += len(bloco)
+
+        if ao_concluir_lote:
+            ao_concluir_lote(resultado_lote, erros_lote)
+        db.session.commit()
+
+    return resumir_lotes(lotes, erros, time.perf_counter() - inicio)
+
+
+def importar_arquivo(caminho: str, filename: str, streaming: bool = False, ao_concluir_lote=None, atualizar: bool = True) -> dict:
+    tamanho_lote = current_app.config['IMPORTACAO_TAMANHO_LOTE']
+    eh_csv = filename.lower().endswith('.csv')
+
+    with open(caminho, 'rb') as arquivo:
+        if streaming:
+            blocos = ler_blocos_csv(arquivo, tamanho_lote) if eh_csv else ler_blocos_xlsx(arquivo, tamanho_lote)
+        else:
+            if eh_csv:
+                df = pd.read_csv(arquivo, encoding='utf-8', dtype={'CHAVENFE': str})
+            else:
+                df = pd.read_excel(arquivo, engine='openpyxl', dtype={'CHAVENFE': str})
+            faltantes = colunas_faltantes(df.columns)
+            if faltantes:
+                raise ColunasFaltantesError(faltantes)
+            blocos = fatiar_dataframe(df, tamanho_lote)
+        return importar_blocos(blocos, ao_concluir_lote, atualizar)
+
+
+def resumir_lotes(lotes: list[dict], erros: list[dict], duracao_segundos: float) -> dict:
+    linhas = sum(lote['linhas'] for lote in lotes)
+    return {
+        "linhas": linhas,
+        "inseridas": sum(lote['inseridas'] for lote in lotes),
+        "atualizadas": sum(lote['atualizadas'] for lote in lotes),
+        "ignoradas": sum(lote['ignoradas'] for lote in lotes),
+        "rejeitadas": sum(lote['rejeitadas'] for lote in lotes),
+        "erros": erros,
+        "lotes": lotes,
+        "tempo_total_ms": round(duracao_segundos * 1000, 1),
+        "linhas_por_segundo": round(linhas / duracao_segundos, 1) if duracao_segundos > 0 else None
+    }
@@ -0,0 +1,124 @@
+import numpy as np
+import pandas as pd
+from datetime import datetime
+from sqlalchemy import select, update
+from flask import current_app
+from app.extensions import db
+from app.models.entrega import (
+    Entrega, STATUS_SAIDA_PENDENTE, STATUS_CONCLUIDA_NO_PRAZO, STATUS_CONCLUIDA_FORA_DO_PRAZO,
+    STATUS_PENDENTE_NO_PRAZO, STATUS_PENDENTE_FORA_DO_PRAZO
+)
+from app.utils.calendario import calendario
+
+COLUNAS_INDICADORES = ['STATUSPRAZO', 'DIASATRASO', 'PRAZOMEDIO']
+
+
+def _dias(serie: pd.Series) -> np.ndarray:
+    return pd.to_datetime(serie).to_numpy(dtype='datetime64[D]')
+
+
+def calcular_indicadores(df: pd.DataFrame, hoje=None) -> pd.DataFrame:
+    hoje = np.datetime64(hoje or datetime.now().date(), 'D')
+
+    carregamento = _dias(df['DTCARREGAMENTO'])
+    finalizacao = _dias(df['DATAFINALIZACAO'])
+    referencia = _dias(df['AGENDAMENTO'].where(df['AGENDAMENTO'].notna(), df['PREVISAOENTREGA']))
+    finalizada = ~np.isnat(finalizacao)
+    data_final = np.where(finalizada, finalizacao, hoje)
+    tem_referencia = ~np.isnat(referencia)
+
+    no_prazo = np.where(finalizada, data_final <= referencia, referencia >= hoje) & tem_referencia
+    status = np.where(
+        finalizada,
+        np.where(no_prazo, STATUS_CONCLUIDA_NO_PRAZO, STATUS_CONCLUIDA_FORA_DO_PRAZO),
+        np.where(no_prazo, STATUS_PENDENTE_NO_PRAZO, STATUS_PENDENTE_FORA_DO_PRAZO)
+    ).astype(object)
+    status[np.isnat(carregamento)] = STATUS_SAIDA_PENDENTE
+
+    ufs = df['UF'].tolist()
+    municipios = df['MUNICIPIO'].tolist()
+
+    atrasadas = tem_referencia & (data_final > referencia)
+    dias_atraso = np.zeros(len(df), dtype='int64')
+    if atrasadas.any():
+        dias_atraso[atrasadas] = calendario.working_days_between_lote(
+            referencia[atrasadas], data_final[atrasadas],
+            ufs=np.array(ufs, dtype=object)[atrasadas], municipios=np.array(municipios, dtype=object)[atrasadas]
+        )
+
+    prazo_medio = calendario.working_days_between_lote(carregamento, data_final, ufs=ufs, municipios=municipios)
+    prazo_medio[np.isnat(carregamento) | (data_final < carregamento)] = 0
+
+    return pd.DataFrame({
+        'id': df['id'].to_numpy(),
+        'STATUSPRAZO': status,
+        'DIASATRASO': dias_atraso,
+        'PRAZOMEDIO': prazo_medio
+    })
+
+
+def materializar_indicadores(*filtros, hoje=None, tamanho_lote: int | None = None) -> dict:
+    if tamanho_lote is None:
+        tamanho_lote = current_app.config['INDICADORES_TAMANHO_LOTE']
+
+    colunas = [
+        Entrega.id, Entrega.DTCARREGAMENTO, Entrega.PREVISAOENTREGA, Entrega.AGENDAMENTO,
+        Entrega.DATAFINALIZACAO, Entrega.UF, Entrega.MUNICIPIO,
+        Entrega.STATUSPRAZO, Entrega.DIASATRASO, Entrega.PRAZOMEDIO
+    ]
+    nomes = [coluna.key for coluna in colunas]
+
+    avaliadas = 0
+    atualizadas = 0
+    ultimo_id = 0
+    while True:
+        # Paginação por id: o UPDATE de um lote não interfere na leitura do próximo.
+        linhas = db.session.execute(
+            select(*colunas).where(Entrega.id > ultimo_id, *filtros).order_by(Entrega.id).limit(tamanho_lote)
+        ).all()
+        if not linhas:
+            break
+        ultimo_id = linhas[-1].id
+
+        atuais = pd.DataFrame(linhas, columns=nomes)
+        novos = calcular_indicadores(atuais, hoje)
+        # Colunas só com None chegam como object; to_numeric garante comparação numérica.
+        alteradas = (
+            (atuais['STATUSPRAZO'].to_numpy() != novos['STATUSPRAZO'].to_numpy())
+            | (pd.to_numeric(atuais['DIASATRASO']).fillna(-1).to_numpy() != novos['DIASATRASO'].to_numpy())
+            | (pd.to_numeric(atuais['PRAZOMEDIO']).fillna(-1).to_numpy() != novos['PRAZOMEDIO'].to_numpy())
+        )
+        avaliadas += len(atuais)
+
+        if alteradas.any():
+            registros = novos[alteradas].astype(object).to_dict('records')
+            agora = datetime.utcnow()
+            for registro in registros:
+                registro['data_atualizacao'] = agora
+            db.session.execute(update(Entrega), registros)
+            atualizadas += len(registros)
+
+        if len(linhas) < tamanho_lote:
+            break
+
+    return {"avaliadas": avaliadas, "atualizadas": atualizadas}
+
+
+def materializar_por_chaves(chaves: list[str]) -> dict:
+    from app.utils.importacao import TAMANHO_CONSULTA_CHAVES
+
+    total = {"avaliadas": 0, "atualizadas": 0}
+    for inicio in range(0, len(chaves), TAMANHO_CONSULTA_CHAVES):
+        resultado = materializar_indicadores(Entrega.CHAVENFE.in_(chaves[inicio:inicio + TAMANHO_CONSULTA_CHAVES]))
+        total["avaliadas"] += resultado["avaliadas"]
+        total["atualizadas"] += resultado["atualizadas"]
+    return total
+
+
+def materializar_em_aberto(hoje=None) -> dict:
+    # Entregas finalizadas só mudam quando as datas mudam, o que o evento do modelo
+    # e a importação já cobrem; as abertas envelhecem a cada dia.
+    return materializar_indicadores(
+        db.or_(Entrega.DATAFINALIZACAO.is_(None), Entrega.STATUSPRAZO.is_(None)),
+        hoje=hoje
+    )
@@ -0,0 +1,147 @@
+import pandas as pd
+from datetime import date, datetime, timedelta
+from sqlalchemy import delete, func, insert, select
+from app.extensions import db
+from app.models.entrega import (
+    Entrega, STATUS_CONCLUIDA_NO_PRAZO, STATUS_PENDENTE_NO_PRAZO,
+    STATUS_CONCLUIDA_FORA_DO_PRAZO, STATUS_PENDENTE_FORA_DO_PRAZO
+)
+from app.models.metrica import MetricaEntregaDiaria, ControleMetricas
+
+CONTROLE_METRICAS_DIARIAS = 'entregas_diarias'
+SITUACOES_NO_PRAZO = (STATUS_CONCLUIDA_NO_PRAZO, STATUS_PENDENTE_NO_PRAZO)
+SITUACOES_FORA_DO_PRAZO = (STATUS_CONCLUIDA_FORA_DO_PRAZO, STATUS_PENDENTE_FORA_DO_PRAZO)
+
+# Sobreposição com a execução anterior, para não perder transações que gravaram
+# data_atualizacao antes da marca mas só confirmaram depois dela.
+MARGEM_ATUALIZACAO = timedelta(minutes=5)
+
+
+def _como_data(valor) -> date:
+    # func.date devolve texto no SQLite e date no PostgreSQL.
+    return date.fromisoformat(valor) if isinstance(valor, str) else valor
+
+
+def _inicio_do_dia(dia: date) -> datetime:
+    return datetime.combine(dia, datetime.min.time())
+
+
+def agrupar_intervalos(dias) -> list[tuple[date, date]]:
+    intervalos = []
+    for dia in sorted(dias):
+        if intervalos and dia - intervalos[-1][1] <= timedelta(days=1):
+            intervalos[-1] = (intervalos[-1][0], dia)
+        else:
+            intervalos.append((dia, dia))
+    return intervalos
+
+
+def dias_afetados(controle: ControleMetricas, hoje: date) -> set[date]:
+    dia_faturamento = func.date(Entrega.DTFAT)
+
+    consulta = select(dia_faturamento).distinct()
+    if controle.marca_atualizacao is not None:
+        consulta = consulta.where(Entrega.data_atualizacao > controle.marca_atualizacao - MARGEM_ATUALIZACAO)
+    dias = {_como_data(dia) for dia in db.session.execute(consulta).scalars() if dia is not None}
+
+    # Entregas em aberto cuja data limite passou desde a última execução mudam de
+    # situação sem que a linha seja alterada.
+    if controle.data_referencia is not None and controle.data_referencia < hoje:
+        vencidas = select(dia_faturamento).distinct().where(
+            Entrega.DATAFINALIZACAO.is_(None),
+            Entrega.data_limite >= _inicio_do_dia(controle.data_referencia),
+            Entrega.data_limite < _inicio_do_dia(hoje)
+        )
+        dias.update(_como_data(dia) for dia in db.session.execute(vencidas).scalars() if dia is not None)
+
+    return dias
+
+
+def recalcular_intervalo(inicio: date, fim: date):
+    db.session.execute(
+        delete(MetricaEntregaDiaria).where(MetricaEntregaDiaria.dia >= inicio, MetricaEntregaDiaria.dia <= fim)
+    )
+
+    dia = func.date(Entrega.DTFAT)
+    situacao = Entrega.situacao_prazo
+    agregado = select(
+        dia, Entrega.UF, Entrega.TRANSPORTADORA, situacao,
+        func.count(Entrega.id),
+        func.coalesce(func.sum(Entrega.VLTOTAL), 0),
+        func.coalesce(func.sum(Entrega.TOTPESO), 0),
+        func.coalesce(func.sum(Entrega.DIASATRASO), 0)
+    ).where(
+        Entrega.DTFAT >= _inicio_do_dia(inicio),
+        Entrega.DTFAT < _inicio_do_dia(fim + timedelta(days=1))
+    ).group_by(dia, Entrega.UF, Entrega.TRANSPORTADORA, situacao)
+
+    db.session.execute(insert(MetricaEntregaDiaria).from_select(
+        ['dia', 'uf', 'transportadora', 'situacao', 'quantidade', 'valor_total', 'peso_total', 'dias_atraso_total'],
+        agregado
+    ))
+
+
+def atualizar_metricas(hoje: date | None = None, reconstruir: bool = False) -> dict:
+    hoje = hoje or date.today()
+    controle = ControleMetricas.query.filter_by(nome=CONTROLE_METRICAS_DIARIAS).first()
+    if controle is None:
+        controle = ControleMetricas(nome=CONTROLE_METRICAS_DIARIAS, dias_recalculados=0)
+        db.session.add(controle)
+    if reconstruir:
+        controle.marca_atualizacao = None
+        controle.data_referencia = None
+        db.session.execute(delete(MetricaEntregaDiaria))
+
+    # data_atualizacao é gravada com datetime.utcnow() pela aplicação.
+    marca = datetime.utcnow()
+    dias = dias_afetados(controle, hoje)
+    intervalos = agrupar_intervalos(dias)
+    for inicio, fim in intervalos:
+        recalcular_intervalo(inicio, fim)
+
+    controle.marca_atualizacao = marca
+    controle.data_referencia = hoje
+    controle.data_execucao = datetime.utcnow()
+    controle.dias_recalculados = len(dias)
+    return {"dias_recalculados": len(dias), "intervalos": len(intervalos)}
+
+
+def consultar_metricas(data_inicial: date | None = None, data_final: date | None = None,
+                       uf: str | None = None, transportadora: str | None = None) -> dict:
+    consulta = select(
+        MetricaEntregaDiaria.dia, MetricaEntregaDiaria.uf, MetricaEntregaDiaria.transportadora,
+        MetricaEntregaDiaria.situacao, MetricaEntregaDiaria.quantidade, MetricaEntregaDiaria.valor_total,
+        MetricaEntregaDiaria.peso_total, MetricaEntregaDiaria.dias_atraso_total
+    )
+    if data_inicial:
+        consulta = consulta.where(MetricaEntregaDiaria.dia >= data_inicial)
+    if data_final:
+        consulta = consulta.where(MetricaEntregaDiaria.dia <= data_final)
+    if uf:
+        consulta = consulta.where(MetricaEntregaDiaria.uf == uf.upper())
+    if transportadora:
+        consulta = consulta.where(MetricaEntregaDiaria.transportadora.ilike(f'%{transportadora}%'))
+
+    df = pd.DataFrame(
+        db.session.execute(consulta).all(),
+        columns=['dia', 'uf', 'transportadora', 'situacao', 'quantidade', 'valor_total', 'peso_total', 'dias_atraso_total']
+    ).astype({'quantidade': 'int64', 'valor_total': 'float64', 'peso_total': 'float64', 'dias_atraso_total': 'int64'})
+    controle = ControleMetricas.query.filter_by(nome=CONTROLE_METRICAS_DIARIAS).first()
+
+    df['no_prazo'] = df['quantidade'].where(df['situacao'].isin(SITUACOES_NO_PRAZO), 0)
+    df['atrasadas'] = df['quantidade'].where(df['situacao'].isin(SITUACOES_FORA_DO_PRAZO), 0)
+
+    por_uf = df.groupby('uf', as_index=False)[['quantidade', 'no_prazo', 'atrasadas']].sum()
+    por_uf['taxa_no_prazo'] = (por_uf['no_prazo'] / por_uf['quantidade']).round(4)
+    por_dia = df.groupby('dia', as_index=False)[['quantidade', 'valor_total', 'peso_total', 'atrasadas']].sum()
+    por_dia['dia'] = por_dia['dia'].map(lambda dia: dia.isoformat())
+
+    return {
+        "total": int(df['quantidade'].sum()),
+        "por_situacao": df.groupby('situacao', as_index=False)['quantidade'].sum().to_dict('records'),
+        "por_transportadora": df.groupby('transportadora', as_index=False)[['quantidade', 'atrasadas', 'dias_atraso_total']]
+            .sum().sort_values('atrasadas', ascending=False).to_dict('records'),
+        "por_uf": por_uf.to_dict('records'),
+        "por_dia": por_dia.to_dict('records'),
+        "atualizado_em": controle.data_execucao.isoformat() if controle and controle.data_execucao else None
+    }
@@ -0,0 +1,201 @@
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, wait
+from datetime import datetime
+from sqlalchemy import delete, insert
+from config import Config
+from app.extensions import db, rastreamento_executor
+from app.models.entrega import Entrega
+from app.models.rastreamento import Rastreamento
+from app.models.transportadora import Transportadora
+
+from app.clients.acette_api import AcetteAPI
+from app.clients.evs_api import EVSAPI
+from app.clients.mix_api import MIXAPI
+from app.clients.ssw_api import SSWAPI
+from app.clients.protecao import CIRCUITO_ABERTO, CIRCUITO_MEIO_ABERTO, protecao_transportadoras
+
+API_CLIENTS = {
+    'ACETTE': AcetteAPI,
+    'EVS': EVSAPI,
+    'MIX': MIXAPI,
+    'SSW': SSWAPI
+}
+
+
+def limites_por_transportadora(valor: str | None) -> dict[str, int]:
+    # Formato "SSW=8,EVS=2"; transportadoras sem entrada usam o limite padrão.
+    limites = {}
+    for item in (valor or '').split(','):
+        if '=' in item:
+            identificador, limite = item.split('=', 1)
+            limites[identificador.strip().upper()] = max(1, int(limite))
+    return limites
+
+
+def _data_evento(valor) -> datetime | None:
+    if isinstance(valor, datetime):
+        return valor
+    try:
+        return datetime.fromisoformat(valor)
+    except (TypeError, ValueError):
+        return None
+
+
+def _registro_evento(entrega_id: int, evento: dict, agora: datetime) -> dict:
+    localizacao = evento.get("cidade") or evento.get("local")
+    return {
+        'entrega_id': entrega_id,
+        'timestamp': _data_evento(evento.get("data_hora_iso")) or agora,
+        'status_descricao': str(evento.get("descricao") or evento.get("ocorrencia") or 'Sem descrição')[:200],
+        'localizacao': str(localizacao)[:150] if localizacao else None
+    }
+
+
+def consultar_transportadora(cliente, identificador: str, alvo) -> dict | None:
+    # Roda nas threads do pool: só HTTP, nada de sessão do banco.
+    if identificador == 'SSW':
+        cnpj_filial = Config.FILIAL_CNPJ_MAP.get(alvo.CODFILIAL)
+        if not cnpj_filial or not alvo.api_config_key:
+            return {"status": "Falha", "message": f"CNPJ da filial ou tipo de serviço SSW não configurado para entrega {alvo.id}."}
+        return cliente.rastrear_nf(
+            num_nota=str(alvo.NUMNOTA),
+            cnpj_filial=cnpj_filial,
+            tipo_ssw_servico=alvo.api_config_key
+        )
+    return cliente.rastrear_nf(alvo.CHAVENFE)
+
+
+class MotorRastreamento:
+    def __init__(self, executor=None, limite_padrao: int | None = None, limites: dict[str, int] | None = None,
+                 tamanho_lote: int | None = None):
+        self.executor = executor or rastreamento_executor
+        self.limite_padrao = limite_padrao or Config.RASTREAMENTO_LIMITE_POR_TRANSPORTADORA
+        self.limites = limites if limites is not None else limites_por_transportadora(Config.RASTREAMENTO_LIMITES)
+        self.tamanho_lote = tamanho_lote or Config.RASTREAMENTO_TAMANHO_LOTE_GRAVACAO
+        self._clientes = {}
+
+    def _cliente(self, identificador: str):
+        # Um cliente por transportadora e por varredura: o token obtido no login é
+        # reaproveitado por todas as notas, em vez de um login por entrega.
+        if identificador not in self._clientes:
+            self._clientes[identificador] = API_CLIENTS[identificador]()
+        return self._clientes[identificador]
+
+    def consulta_alvos(self, *filtros):
+        return db.session.query(
+            Entrega.id, Entrega.CHAVENFE, Entrega.NUMNOTA, Entrega.CODFILIAL,
+            Transportadora.api_identifier, Transportadora.api_config_key
+        ).outerjoin(
+            Transportadora, Entrega.transportadora_cod == Transportadora.codfornecfrete
+        ).filter(
+            Entrega.DATAFINALIZACAO.is_(None),
+            *filtros
+        )
+
+    def carregar_alvos(self, *filtros) -> list:
+        protecao_transportadoras.carregar_configuracao()
+        return self.consulta_alvos(*filtros).all()
+
+    def executar(self, *filtros) -> dict:
+        return self.processar(self.carregar_alvos(*filtros))
+
+    def processar(self, alvos) -> dict:
+        inicio = time.monotonic()
+        resultado = {'total': 0, 'rastreadas': 0, 'sem_eventos': 0, 'falhas': 0, 'sem_cliente': 0, 'adiadas': 0,
+                     'eventos_gravados': 0}
+
+        filas = {}
+        for alvo in alvos:
+            resultado['total'] += 1
+            identificador = (alvo.api_identifier or '').upper()
+            if identificador not in API_CLIENTS:
+                resultado['sem_cliente'] += 1
+                continue
+            filas.setdefault(identificador, deque()).append(alvo)
+
+        em_andamento = {identificador: 0 for identificador in filas}
+        pendentes = {}
+        lote = []
+
+        def despachar() -> float | None:
+            # Respeita o limite de cada transportadora sem prender threads do pool
+            # esperando vaga: só submete quando há vaga para aquela transportadora.
+            # Devolve quanto falta para a próxima ficha de quem parou só pela taxa.
+            espera = None
+            for identificador, fila in filas.items():
+                if not fila:
+                    continue
+                circuito = protecao_transportadoras.circuito(identificador)
+                estado = circuito.disjuntor.estado
+                if estado == CIRCUITO_ABERTO:
+                    # API fora do ar: as entregas ficam para a próxima varredura em vez
+                    # de ocupar threads esperando o timeout.
+                    resultado['adiadas'] += len(fila)
+                    fila.clear()
+                    continue
+
+                # Meio aberto: uma entrega de teste por vez até a API responder.
+                limite = 1 if estado == CIRCUITO_MEIO_ABERTO else self.limites.get(identificador, self.limite_padrao)
+                while fila and em_andamento[identificador] < limite:
+                    if not circuito.limitador.consumir():
+                        espera_ficha = circuito.limitador.espera()
+                        espera = espera_ficha if espera is None else min(espera, espera_ficha)
+                        break
+                    alvo = fila.popleft()
+                    futuro = self.executor.submit(consultar_transportadora, self._cliente(identificador), identificador, alvo)
+                    pendentes[futuro] = (identificador, alvo)
+                    em_andamento[identificador] += 1
+            return espera
+
+        espera = despachar()
+        while pendentes or espera is not None:
+            if not pendentes:
+                # Só falta ficha: quem espera é esta thread, não as do pool.
+                time.sleep(espera)
+                espera = despachar()
+                continue
+
+            concluidos, _ = wait(pendentes, timeout=espera, return_when=FIRST_COMPLETED)
+            for futuro in concluidos:
+                identificador, alvo = pendentes.pop(futuro)
+                em_andamento[identificador] -= 1
+                try:
+                    dados = futuro.result()
+                except Exception as e:
+                    print(f"Erro ao processar a API {identificador} para a entrega {alvo.id}: {e}")
+                    dados = None
+
+                if not dados or dados.get("status") in ("Falha", "Erro API"):
+                    resultado['falhas'] += 1
+                elif not dados.get("eventos"):
+                    resultado['sem_eventos'] += 1
+                else:
+                    resultado['rastreadas'] += 1
+                    lote.append((alvo.id, dados["eventos"]))
+
+            if len(lote) >= self.tamanho_lote:
+                resultado['eventos_gravados'] += self.gravar_lote(lote)
+                lote = []
+            espera = despachar()
+
+        if lote:
+            resultado['eventos_gravados'] += self.gravar_lote(lote)
+
+        resultado['duracao_segundos'] = round(time.monotonic() - inicio, 2)
+        return resultado
+
+    def gravar_lote(self, lote: list) -> int:
+        agora = datetime.utcnow()
+        registros = [_registro_evento(entrega_id, evento, agora) for entrega_id, eventos in lote for evento in eventos]
+        try:
+            # O histórico de cada entrega é substituído pelo retornado pela transportadora.
+            db.session.execute(delete(Rastreamento).where(Rastreamento.entrega_id.in_([entrega_id for entrega_id, _ in lote])))
+            if registros:
+                db.session.execute(insert(Rastreamento), registros)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            print(f"Erro ao gravar rastreamento de {len(lote)} entregas: {e}")
+            return 0
+        return len(registros)
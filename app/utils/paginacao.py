@@ -0,0 +1,28 @@
+import base64
+import json
+from datetime import datetime
+
+
+class CursorInvalidoError(ValueError):
+    def __init__(self):
+        super().__init__("Cursor inválido ou expirado. Reinicie a paginação sem o parâmetro 'after'.")
+
+
+def codificar_cursor(*valores) -> str:
+    serializados = [valor.isoformat() if isinstance(valor, datetime) else valor for valor in valores]
+    bruto = json.dumps(serializados, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(bruto).decode('ascii').rstrip('=')
+
+
+def decodificar_cursor(cursor: str, *tipos) -> list:
+    try:
+        bruto = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        valores = json.loads(bruto)
+        if not isinstance(valores, list) or len(valores) != len(tipos):
+            raise CursorInvalidoError()
+        return [
+            datetime.fromisoformat(valor) if tipo is datetime else tipo(valor)
+            for valor, tipo in zip(valores, tipos)
+        ]
+    except (ValueError, TypeError):
+        raise CursorInvalidoError()
@@ -0,0 +1,157 @@
+from datetime import date
+import pandas as pd
+from flask.json.provider import DefaultJSONProvider
+from app.models.entrega import Entrega
+from app.models.motorista import Motorista
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+COLUNAS_ENTREGA = {
+    'id': Entrega.id,
+    'CODFILIAL': Entrega.CODFILIAL,
+    'DTFAT': Entrega.DTFAT,
+    'DTCARREGAMENTO': Entrega.DTCARREGAMENTO,
+    'ROMANEIO': Entrega.ROMANEIO,
+    'TIPOVENDA': Entrega.TIPOVENDA,
+    'NUMNOTA': Entrega.NUMNOTA,
+    'NUMPED': Entrega.NUMPED,
+    'CODCLI': Entrega.CODCLI,
+    'CLIENTE': Entrega.CLIENTE,
+    'MUNICIPIO': Entrega.MUNICIPIO,
+    'UF': Entrega.UF,
+    'EMAIL': Entrega.EMAIL,
+    'TELCOM': Entrega.TELCOM,
+    'EMAIL_1': Entrega.EMAIL_1,
+    'VENDEDOR': Entrega.VENDEDOR,
+    'CODFORNECFRETE': Entrega.transportadora_cod,
+    'TRANSPORTADORA': Entrega.TRANSPORTADORA,
+    'VLTOTAL': Entrega.VLTOTAL,
+    'NUMVOLUME': Entrega.NUMVOLUME,
+    'TOTPESO': Entrega.TOTPESO,
+    'PRAZOENTREGA': Entrega.PRAZOENTREGA,
+    'CHAVENFE': Entrega.CHAVENFE,
+    'PREVISAOENTREGA': Entrega.PREVISAOENTREGA,
+    'DATAFINALIZACAO': Entrega.DATAFINALIZACAO,
+    'AGENDAMENTO': Entrega.AGENDAMENTO,
+    'DEVOLUCAO': Entrega.DEVOLUCAO,
+    'data_criacao': Entrega.data_criacao,
+    'data_atualizacao': Entrega.data_atualizacao,
+    'motorista_id': Entrega.motorista_id,
+    'STATUSPRAZO': Entrega.STATUSPRAZO,
+    'DIASATRASO': Entrega.DIASATRASO,
+    'PRAZOMEDIO': Entrega.PRAZOMEDIO,
+    'motorista_nome': Motorista.nome,
+}
+
+CAMPOS_INDICADORES = ('STATUS', 'DIASATRASO', 'PRAZOMEDIO')
+# Mesma ordem de chaves de Entrega.to_dict.
+CAMPOS_ENTREGA = tuple(
+    campo for campo in COLUNAS_ENTREGA if campo not in ('STATUSPRAZO', 'DIASATRASO', 'PRAZOMEDIO', 'motorista_nome')
+) + CAMPOS_INDICADORES + ('motorista_nome',)
+COLUNAS_BASE_INDICADORES = (
+    'id', 'DTCARREGAMENTO', 'PREVISAOENTREGA', 'AGENDAMENTO', 'DATAFINALIZACAO', 'UF', 'MUNICIPIO',
+    'STATUSPRAZO', 'DIASATRASO', 'PRAZOMEDIO'
+)
+ORIGEM_CAMPOS = {'STATUS': 'STATUSPRAZO'}
+
+
+def _iso(valor):
+    return valor.isoformat() if valor is not None else None
+
+
+def _eh_data(origem: str) -> bool:
+    return issubclass(COLUNAS_ENTREGA[origem].type.python_type, date)
+
+
+class SerializadorEntrega:
+    def __init__(self, campos: list[str] | None = None, colunas_extras: tuple[str, ...] = ()):
+        campos = tuple(campos) if campos else CAMPOS_ENTREGA
+        invalidos = [campo for campo in campos if campo not in CAMPOS_ENTREGA]
+        if invalidos:
+            raise ValueError(f"Campos inválidos em 'fields': {', '.join(invalidos)}.")
+
+        self.campos = campos
+        self.calcula_indicadores = any(campo in CAMPOS_INDICADORES for campo in campos)
+
+        origens_campos = [ORIGEM_CAMPOS.get(campo, campo) for campo in campos]
+        origens = origens_campos + list(colunas_extras)
+        if self.calcula_indicadores:
+            origens += COLUNAS_BASE_INDICADORES
+        self.origens = tuple(dict.fromkeys(origens))
+        self.colunas = [COLUNAS_ENTREGA[origem].label(origem) for origem in self.origens]
+        self.com_motorista = 'motorista_nome' in self.origens
+
+        self.posicoes = {origem: indice for indice, origem in enumerate(self.origens)}
+        self._plano = tuple(
+            (campo, self.posicoes[origem], _eh_data(origem))
+            for campo, origem in zip(campos, origens_campos)
+        )
+
+    def consulta(self, query):
+        if self.com_motorista:
+            query = query.outerjoin(Motorista, Entrega.motorista_id == Motorista.id)
+        return query.with_entities(*self.colunas)
+
+    def _completar_indicadores(self, linhas: list) -> list:
+        posicao_status = self.posicoes['STATUSPRAZO']
+        pendentes = [indice for indice, linha in enumerate(linhas) if linha[posicao_status] is None]
+        if not pendentes:
+            return linhas
+
+        # Linhas ainda não materializadas: mesmo cálculo de Entrega.to_dict, em lote.
+        from app.utils.indicadores import calcular_indicadores
+
+        base = pd.DataFrame(
+            [[linhas[indice][self.posicoes[col]] for col in COLUNAS_BASE_INDICADORES] for indice in pendentes],
+            columns=COLUNAS_BASE_INDICADORES
+        )
+        calculados = calcular_indicadores(base)
+        linhas = [list(linha) for linha in linhas]
+        for indice, status, atraso, prazo in zip(
+            pendentes, calculados['STATUSPRAZO'], calculados['DIASATRASO'], calculados['PRAZOMEDIO']
+        ):
+            linhas[indice][posicao_status] = status
+            linhas[indice][self.posicoes['DIASATRASO']] = int(atraso)
+            linhas[indice][self.posicoes['PRAZOMEDIO']] = int(prazo)
+        return linhas
+
+    def serializar(self, linhas) -> list[dict]:
+        linhas = list(linhas)
+        if self.calcula_indicadores:
+            linhas = self._completar_indicadores(linhas)
+        plano = self._plano
+        return [
+            {campo: _iso(linha[posicao]) if eh_data else linha[posicao] for campo, posicao, eh_data in plano}
+            for linha in linhas
+        ]
+
+
+def campos_solicitados(valor: str | None) -> list[str] | None:
+    if not valor:
+        return None
+    return [campo.strip() for campo in valor.split(',') if campo.strip()]
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    # Datas passam pelo default do Flask para manter o formato das respostas atuais.
+    opcoes = (orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY) if orjson else 0
+
+    def dumps(self, obj, **kwargs):
+        if kwargs:
+            return super().dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=self.default, option=self.opcoes).decode('utf-8')
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(
+            orjson.dumps(obj, default=self.default, option=self.opcoes),
+            mimetype=self.mimetype
+        )
+
+
+def configurar_json(app):
+    if orjson is not None:
+        app.json = OrjsonProvider(app)
@@ -0,0 +1,74 @@
+from datetime import datetime, timedelta, timezone
+from flask import current_app
+from sqlalchemy import tuple_
+from app.extensions import db
+from app.models.exclusao import Exclusao
+from app.utils.paginacao import codificar_cursor, decodificar_cursor
+
+
+class SincronizacaoExpiradaError(Exception):
+    def __init__(self, dias: int):
+        super().__init__(
+            f"O 'since' informado é anterior aos {dias} dias em que as exclusões são mantidas. "
+            "Faça uma sincronização completa e recomece a partir de uma data ISO 8601."
+        )
+
+
+def decodificar_since(since: str) -> tuple[datetime, int]:
+    # Aceita o token devolvido em 'next_since' ou um timestamp ISO (primeira sincronização).
+    # O fromisoformat do Python 3.10 não aceita o sufixo 'Z'.
+    try:
+        momento = datetime.fromisoformat(since[:-1] + '+00:00' if since.endswith(('Z', 'z')) else since)
+    except ValueError:
+        momento, ultimo_id = decodificar_cursor(since, datetime, int)
+        # Um token mais antigo que a retenção perderia exclusões já removidas de 'exclusoes'.
+        dias = current_app.config['EXCLUSOES_RETENCAO_DIAS']
+        if momento < datetime.utcnow() - timedelta(days=dias):
+            raise SincronizacaoExpiradaError(dias)
+        return momento, ultimo_id
+
+    # data_atualizacao é gravada em UTC sem fuso.
+    if momento.tzinfo is not None:
+        momento = momento.astimezone(timezone.utc).replace(tzinfo=None)
+    return momento, 0
+
+
+def consultar_alteracoes(query, modelo, since: str, per_page: int) -> tuple[list, list[int], str, bool]:
+    desde, ultimo_id = decodificar_since(since)
+    per_page = max(1, min(per_page, current_app.config['SINCRONIZACAO_MAX_POR_PAGINA']))
+
+    # Não entrega linhas gravadas nos últimos segundos: uma transação ainda aberta
+    # pode confirmar depois com data_atualizacao anterior ao token já devolvido.
+    limite = datetime.utcnow() - timedelta(seconds=current_app.config['SINCRONIZACAO_MARGEM_SEGUNDOS'])
+
+    linhas = query.filter(
+        tuple_(modelo.data_atualizacao, modelo.id) > tuple_(desde, ultimo_id),
+        modelo.data_atualizacao <= limite
+    ).order_by(modelo.data_atualizacao, modelo.id).limit(per_page + 1).all()
+    tem_mais = len(linhas) > per_page
+    linhas = linhas[:per_page]
+
+    if tem_mais:
+        fim = linhas[-1].data_atualizacao
+        proximo = codificar_cursor(fim, linhas[-1].id)
+    else:
+        fim = limite
+        proximo = codificar_cursor(limite, 0)
+
+    removidos = [registro_id for registro_id, in db.session.query(Exclusao.registro_id).filter(
+        Exclusao.tabela == modelo.__tablename__,
+        Exclusao.data_exclusao > desde,
+        Exclusao.data_exclusao <= fim
+    ).order_by(Exclusao.data_exclusao, Exclusao.id)]
+
+    return linhas, removidos, proximo, tem_mais
+
+
+def resposta_alteracoes(itens: list, removidos: list[int], proximo: str, tem_mais: bool) -> dict:
+    return {
+        "items": itens,
+        "deleted": removidos,
+        "next_since": proximo,
+        "has_more": tem_mais
+    }
+
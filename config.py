@@ -1,4 +1,5 @@
 import os
+from datetime import datetime
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -19,6 +20,75 @@ class Config:
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024 
     ALLOWED_EXTENSIONS = {'pdf', 'jpg', 'jpeg', 'png', 'gif'}
 
+    IMPORTACAO_TAMANHO_LOTE = int(os.getenv("IMPORTACAO_TAMANHO_LOTE", 5000))
+    IMPORTACAO_MAX_ERROS_REPORTADOS = int(os.getenv("IMPORTACAO_MAX_ERROS_REPORTADOS", 500))
+    IMPORTACAO_MAX_CONTENT_LENGTH = int(os.getenv("IMPORTACAO_MAX_CONTENT_LENGTH", 512 * 1024 * 1024))
+    IMPORTACAO_WORKERS = int(os.getenv("IMPORTACAO_WORKERS", 2))
+    IMPORTACAO_DIR = os.path.join(os.getcwd(), 'uploads', 'importacoes')
+    IMPORTACAO_VERIFICACAO_MINUTOS = int(os.getenv("IMPORTACAO_VERIFICACAO_MINUTOS", 5))
+    # Sem sinal do processo dono por esse tempo, a importação é dada como interrompida.
+    IMPORTACAO_TEMPO_ORFA_MINUTOS = int(os.getenv("IMPORTACAO_TEMPO_ORFA_MINUTOS", 15))
+
+    SQL_CONTAR_CONSULTAS = os.getenv("SQL_CONTAR_CONSULTAS", "false").lower() == "true"
+    SQL_LIMITE_CONSULTAS_POR_REQUISICAO = int(os.getenv("SQL_LIMITE_CONSULTAS_POR_REQUISICAO", 20))
+
+    ENTREGAS_MAX_POR_PAGINA = int(os.getenv("ENTREGAS_MAX_POR_PAGINA", 1000))
+    MANIFESTO_MAX_POR_PAGINA = int(os.getenv("MANIFESTO_MAX_POR_PAGINA", 200))
+    SINCRONIZACAO_MAX_POR_PAGINA = int(os.getenv("SINCRONIZACAO_MAX_POR_PAGINA", 1000))
+    SINCRONIZACAO_MARGEM_SEGUNDOS = int(os.getenv("SINCRONIZACAO_MARGEM_SEGUNDOS", 5))
+    # Tokens 'since' mais antigos que isso recebem 410 e exigem sincronização completa.
+    EXCLUSOES_RETENCAO_DIAS = int(os.getenv("EXCLUSOES_RETENCAO_DIAS", 30))
+
+    EXPORTACAO_TAMANHO_LOTE = int(os.getenv("EXPORTACAO_TAMANHO_LOTE", 2000))
+
+    METRICAS_INTERVALO_MINUTOS = int(os.getenv("METRICAS_INTERVALO_MINUTOS", 5))
+    METRICAS_RECONSTRUCAO_HORA = int(os.getenv("METRICAS_RECONSTRUCAO_HORA", 3))
+
+    INDICADORES_TAMANHO_LOTE = int(os.getenv("INDICADORES_TAMANHO_LOTE", 5000))
+
+    # memoria | redis | desativado
+    CACHE_TIPO = os.getenv("CACHE_TIPO", "memoria")
+    CACHE_REDIS_URL = os.getenv("CACHE_REDIS_URL", "redis://localhost:6379/0")
+    CACHE_PREFIXO = os.getenv("CACHE_PREFIXO", "sistemagestao:cache")
+    CACHE_TTL_SEGUNDOS = int(os.getenv("CACHE_TTL_SEGUNDOS", 60))
+    CACHE_MAX_ITENS = int(os.getenv("CACHE_MAX_ITENS", 1024))
+
+    RASTREAMENTO_WORKERS = int(os.getenv("RASTREAMENTO_WORKERS", 16))
+    RASTREAMENTO_LIMITE_POR_TRANSPORTADORA = int(os.getenv("RASTREAMENTO_LIMITE_POR_TRANSPORTADORA", 4))
+    # Limites específicos, ex.: "SSW=8,EVS=2".
+    RASTREAMENTO_LIMITES = os.getenv("RASTREAMENTO_LIMITES", "")
+    RASTREAMENTO_TAMANHO_LOTE_GRAVACAO = int(os.getenv("RASTREAMENTO_TAMANHO_LOTE_GRAVACAO", 200))
+    RASTREAMENTO_TAMANHO_VARREDURA = int(os.getenv("RASTREAMENTO_TAMANHO_VARREDURA", 500))
+
+    TRANSPORTE_TIMEOUT_CONEXAO = float(os.getenv("TRANSPORTE_TIMEOUT_CONEXAO", 5))
+    TRANSPORTE_TIMEOUT_LEITURA = float(os.getenv("TRANSPORTE_TIMEOUT_LEITURA", 20))
+    TRANSPORTE_POOL_CONEXOES = int(os.getenv("TRANSPORTE_POOL_CONEXOES", 4))
+    TRANSPORTE_POOL_MAXIMO = int(os.getenv("TRANSPORTE_POOL_MAXIMO", 16))
+    TRANSPORTE_RETENTATIVAS = int(os.getenv("TRANSPORTE_RETENTATIVAS", 3))
+    TRANSPORTE_RETENTATIVAS_LEITURA = int(os.getenv("TRANSPORTE_RETENTATIVAS_LEITURA", 1))
+    TRANSPORTE_RETRY_AFTER_MAXIMO_SEGUNDOS = float(os.getenv("TRANSPORTE_RETRY_AFTER_MAXIMO_SEGUNDOS", 10))
+    TRANSPORTE_BACKOFF_SEGUNDOS = float(os.getenv("TRANSPORTE_BACKOFF_SEGUNDOS", 0.5))
+
+    # Padrões por api_identifier; colunas preenchidas na tabela transportadora têm precedência.
+    PROTECAO_REQUISICOES_POR_MINUTO = int(os.getenv("PROTECAO_REQUISICOES_POR_MINUTO", 120))
+    PROTECAO_RAJADA = int(os.getenv("PROTECAO_RAJADA", 10))
+    PROTECAO_LIMITE_FALHAS = int(os.getenv("PROTECAO_LIMITE_FALHAS", 5))
+    PROTECAO_TEMPO_ABERTURA_SEGUNDOS = int(os.getenv("PROTECAO_TEMPO_ABERTURA_SEGUNDOS", 120))
+
+    # Usado quando o token da transportadora não é um JWT com 'exp'.
+    TOKEN_TTL_PADRAO_SEGUNDOS = int(os.getenv("TOKEN_TTL_PADRAO_SEGUNDOS", 3300))
+    TOKEN_MARGEM_RENOVACAO_SEGUNDOS = int(os.getenv("TOKEN_MARGEM_RENOVACAO_SEGUNDOS", 120))
+
+    CALENDARIO_ANO_INICIAL = int(os.getenv("CALENDARIO_ANO_INICIAL", datetime.now().year - 2))
+    CALENDARIO_ANO_FINAL = int(os.getenv("CALENDARIO_ANO_FINAL", datetime.now().year + 3))
+
+    ENTREGAS_UPSERT_COLUNAS = os.getenv(
+        "ENTREGAS_UPSERT_COLUNAS",
+        "CODFILIAL,DTFAT,DTCARREGAMENTO,ROMANEIO,TIPOVENDA,NUMNOTA,NUMPED,CODCLI,CLIENTE,MUNICIPIO,UF,"
+        "EMAIL,TELCOM,EMAIL_1,VENDEDOR,CODFORNECFRETE,TRANSPORTADORA,VLTOTAL,NUMVOLUME,TOTPESO,"
+        "PRAZOENTREGA,PREVISAOENTREGA,AGENDAMENTO,DATAFINALIZACAO"
+    ).split(',')
+
     SSW_API_PASSWORD_TG = os.getenv("SSW_API_PASSWORD_TG")
     SSW_API_PASSWORD_AMPLA = os.getenv("SSW_API_PASSWORD_AMPLA")
     SSW_BASE_URL = os.getenv("SSW_BASE_URL")
@@ -38,6 +108,7 @@ class Config:
 
     MIX_LOGIN_URL = os.getenv("MIX_LOGIN_URL")
     MIX_USER = os.getenv("MIX_USER")
+    MIX_AUTH_BASE64 = os.getenv("MIX_AUTH_BASE64")
     MIX_PASS = os.getenv("MIX_PASS")
     MIX_TRACKING_URL = os.getenv("MIX_TRACKING_URL")
 
@@ -11,6 +11,10 @@ from app.extensions import db
 from app.models.comprovante import Comprovante
 from app.models.devolucao import Devolucao
 from app.models.entrega import Entrega
+from app.models.exclusao import Exclusao
+from app.models.feriado import Feriado
+from app.models.importacao import Importacao
+from app.models.metrica import MetricaEntregaDiaria, ControleMetricas
 from app.models.motorista import Motorista
 from app.models.rastreamento import Rastreamento
 from app.models.transportadora import Transportadora
@@ -0,0 +1,66 @@
+"""Adiciona índices para os filtros mais usados
+
+Revision ID: 3f9b6e1d8a27
+Revises: 7c4d90a2b5e8
+Create Date: 2026-10-18 16:12:04.681930
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f9b6e1d8a27'
+down_revision = '7c4d90a2b5e8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('entregas', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_entregas_NUMNOTA'), ['NUMNOTA'], unique=False)
+        batch_op.create_index(batch_op.f('ix_entregas_STATUS'), ['STATUS'], unique=False)
+        batch_op.create_index(batch_op.f('ix_entregas_CODFORNECFRETE'), ['CODFORNECFRETE'], unique=False)
+        # Listagem paginada ordena por DTFAT com id como desempate.
+        batch_op.create_index('ix_entregas_DTFAT_id', ['DTFAT', 'id'], unique=False)
+
+    # Parciais: a maioria das entregas não tem motorista e já está finalizada.
+    op.create_index(
+        'ix_entregas_motorista_id', 'entregas', ['motorista_id'], unique=False,
+        postgresql_where=sa.text('motorista_id IS NOT NULL'),
+        sqlite_where=sa.text('motorista_id IS NOT NULL')
+    )
+    op.create_index(
+        'ix_entregas_PREVISAOENTREGA_abertas', 'entregas', ['PREVISAOENTREGA'], unique=False,
+        postgresql_where=sa.text('"DATAFINALIZACAO" IS NULL'),
+        sqlite_where=sa.text('"DATAFINALIZACAO" IS NULL')
+    )
+
+    with op.batch_alter_table('rastreamento', schema=None) as batch_op:
+        batch_op.create_index('ix_rastreamento_entrega_id_timestamp', ['entrega_id', 'timestamp'], unique=False)
+
+    with op.batch_alter_table('comprovantes', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_comprovantes_entrega_id'), ['entrega_id'], unique=False)
+
+    with op.batch_alter_table('devolucoes', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_devolucoes_entrega_id'), ['entrega_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('devolucoes', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_devolucoes_entrega_id'))
+
+    with op.batch_alter_table('comprovantes', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_comprovantes_entrega_id'))
+
+    with op.batch_alter_table('rastreamento', schema=None) as batch_op:
+        batch_op.drop_index('ix_rastreamento_entrega_id_timestamp')
+
+    op.drop_index('ix_entregas_PREVISAOENTREGA_abertas', table_name='entregas')
+    op.drop_index('ix_entregas_motorista_id', table_name='entregas')
+
+    with op.batch_alter_table('entregas', schema=None) as batch_op:
+        batch_op.drop_index('ix_entregas_DTFAT_id')
+        batch_op.drop_index(batch_op.f('ix_entregas_CODFORNECFRETE'))
+        batch_op.drop_index(batch_op.f('ix_entregas_STATUS'))
+        batch_op.drop_index(batch_op.f('ix_entregas_NUMNOTA'))
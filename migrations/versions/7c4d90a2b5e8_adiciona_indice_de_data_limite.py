@@ -0,0 +1,33 @@
+"""Adiciona índice de data limite das entregas em aberto
+
+Revision ID: 7c4d90a2b5e8
+Revises: e83a1f5c07b2
+Create Date: 2026-10-18 15:37:45.120583
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7c4d90a2b5e8'
+down_revision = 'e83a1f5c07b2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Mesmo critério de Entrega.data_limite; parcial porque só as entregas em
+    # aberto mudam de situação com o passar dos dias.
+    op.create_index(
+        'ix_entregas_data_limite_abertas',
+        'entregas',
+        [sa.text('coalesce("AGENDAMENTO", "PREVISAOENTREGA")')],
+        unique=False,
+        postgresql_where=sa.text('"DATAFINALIZACAO" IS NULL'),
+        sqlite_where=sa.text('"DATAFINALIZACAO" IS NULL')
+    )
+
+
+def downgrade():
+    op.drop_index('ix_entregas_data_limite_abertas', table_name='entregas')
@@ -0,0 +1,61 @@
+"""Adiciona suporte à sincronização incremental (data_atualizacao e exclusões)
+
+Revision ID: b52e8d1f6c39
+Revises: a41c7e3f92d0
+Create Date: 2026-10-18 17:06:42.118203
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b52e8d1f6c39'
+down_revision = 'a41c7e3f92d0'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('exclusoes',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('tabela', sa.String(length=50), nullable=False),
+    sa.Column('registro_id', sa.Integer(), nullable=False),
+    sa.Column('data_exclusao', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('exclusoes', schema=None) as batch_op:
+        batch_op.create_index('ix_exclusoes_tabela_data_exclusao', ['tabela', 'data_exclusao'], unique=False)
+
+    with op.batch_alter_table('comprovantes', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('data_atualizacao', sa.DateTime(), nullable=True))
+
+    # Comprovantes existentes nunca foram alterados depois do envio.
+    op.execute(sa.text('UPDATE comprovantes SET data_atualizacao = data_envio'))
+
+    with op.batch_alter_table('comprovantes', schema=None) as batch_op:
+        batch_op.alter_column('data_atualizacao', existing_type=sa.DateTime(), nullable=False)
+        batch_op.create_index('ix_comprovantes_data_atualizacao_id', ['data_atualizacao', 'id'], unique=False)
+
+    with op.batch_alter_table('devolucoes', schema=None) as batch_op:
+        batch_op.create_index('ix_devolucoes_data_atualizacao_id', ['data_atualizacao', 'id'], unique=False)
+
+    with op.batch_alter_table('entregas', schema=None) as batch_op:
+        batch_op.create_index('ix_entregas_data_atualizacao_id', ['data_atualizacao', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('entregas', schema=None) as batch_op:
+        batch_op.drop_index('ix_entregas_data_atualizacao_id')
+
+    with op.batch_alter_table('devolucoes', schema=None) as batch_op:
+        batch_op.drop_index('ix_devolucoes_data_atualizacao_id')
+
+    with op.batch_alter_table('comprovantes', schema=None) as batch_op:
+        batch_op.drop_index('ix_comprovantes_data_atualizacao_id')
+        batch_op.drop_column('data_atualizacao')
+
+    with op.batch_alter_table('exclusoes', schema=None) as batch_op:
+        batch_op.drop_index('ix_exclusoes_tabela_data_exclusao')
+
+    op.drop_table('exclusoes')
@@ -0,0 +1,26 @@
+"""Adiciona índice de ROMANEIO em entregas
+
+Revision ID: c7d3a9e5f1b4
+Revises: b52e8d1f6c39
+Create Date: 2026-10-18 17:14:09.530721
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c7d3a9e5f1b4'
+down_revision = 'b52e8d1f6c39'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('entregas', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_entregas_ROMANEIO'), ['ROMANEIO'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('entregas', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_entregas_ROMANEIO'))
@@ -0,0 +1,30 @@
+"""Adiciona limites de requisições e circuito por transportadora
+
+Revision ID: d8e4b0a6c2f7
+Revises: c7d3a9e5f1b4
+Create Date: 2026-10-18 19:02:41.118274
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd8e4b0a6c2f7'
+down_revision = 'c7d3a9e5f1b4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('transportadora', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('limite_requisicoes_por_minuto', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('limite_falhas_circuito', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('tempo_abertura_circuito_segundos', sa.Integer(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('transportadora', schema=None) as batch_op:
+        batch_op.drop_column('tempo_abertura_circuito_segundos')
+        batch_op.drop_column('limite_falhas_circuito')
+        batch_op.drop_column('limite_requisicoes_por_minuto')
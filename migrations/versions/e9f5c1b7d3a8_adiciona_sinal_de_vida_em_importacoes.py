@@ -0,0 +1,26 @@
+"""Adiciona data_atualizacao em importacoes para detectar importações órfãs
+
+Revision ID: e9f5c1b7d3a8
+Revises: d8e4b0a6c2f7
+Create Date: 2026-10-18 21:14:06.530912
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e9f5c1b7d3a8'
+down_revision = 'd8e4b0a6c2f7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('importacoes', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('data_atualizacao', sa.DateTime(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('importacoes', schema=None) as batch_op:
+        batch_op.drop_column('data_atualizacao')
@@ -0,0 +1,31 @@
+import os
+import pytest
+
+os.environ.setdefault("JWT_SECRET_KEY", "chave-de-testes-com-tamanho-suficiente-para-hs256")
+os.environ.setdefault("FLASK_SECRET_KEY", "chave-de-testes")
+
+from config import Config
+from app import create_app
+from app.extensions import db
+
+
+class ConfigTestes(Config):
+    TESTING = True
+    # TEST_DATABASE_URL permite rodar contra um PostgreSQL; sem ela, usa SQLite em arquivo temporário.
+    SQLALCHEMY_DATABASE_URI = os.getenv("TEST_DATABASE_URL")
+
+
+@pytest.fixture(scope="session")
+def app(tmp_path_factory):
+    if not ConfigTestes.SQLALCHEMY_DATABASE_URI:
+        ConfigTestes.SQLALCHEMY_DATABASE_URI = 'sqlite:///' + str(tmp_path_factory.mktemp("db") / "testes.db")
+    app = create_app(ConfigTestes)
+
+    with app.app_context():
+        if db.engine.dialect.name == 'postgresql':
+            from app.models.entrega import Entrega
+            Entrega.__table__.c.STATUS.type.create(db.engine, checkfirst=True)
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
@@ -0,0 +1,124 @@
+import re
+from datetime import datetime, timedelta
+import pytest
+from sqlalchemy import insert, text
+from werkzeug.datastructures import MultiDict
+from app.extensions import db
+from app.models import Comprovante, Devolucao, Entrega, Motorista, Rastreamento
+from app.routes.entregas import filtrar_entregas, ordenar_entregas
+from app.utils.motor_rastreamento import MotorRastreamento
+
+TOTAL_ENTREGAS = 3000
+
+
+@pytest.fixture(scope="module")
+def dados(app):
+    # Distribuição parecida com a produção: quase tudo finalizado e sem motorista.
+    db.session.add(Motorista(id=1, nome='Motorista', login='motorista', senha_hash='x'))
+    db.session.flush()
+
+    inicio = datetime(2026, 1, 1, 8)
+    entregas = []
+    for i in range(1, TOTAL_ENTREGAS + 1):
+        aberta = i % 20 == 0
+        entregas.append({
+            'id': i, 'CODFILIAL': 1, 'DTFAT': inicio + timedelta(hours=i), 'DTCARREGAMENTO': inicio + timedelta(hours=i),
+            'ROMANEIO': i // 50, 'TIPOVENDA': 1, 'NUMNOTA': 100000 + i, 'NUMPED': i, 'CODCLI': i % 300,
+            'CLIENTE': f'Cliente {i}', 'MUNICIPIO': 'BELO HORIZONTE', 'UF': 'MG', 'TRANSPORTADORA': 'TRANSP',
+            'VLTOTAL': 10.0, 'NUMVOLUME': 1, 'TOTPESO': 1.0, 'PRAZOENTREGA': 3, 'CHAVENFE': f'{i:044d}',
+            'PREVISAOENTREGA': inicio + timedelta(hours=i, days=3),
+            'DATAFINALIZACAO': None if aberta else inicio + timedelta(hours=i, days=2),
+            'STATUS': 'ENTREGA_PENDENTE' if aberta else 'ENTREGA_FINALIZADA',
+            'motorista_id': 1 if i % 25 == 0 else None,
+            'DEVOLUCAO': False, 'data_criacao': inicio, 'data_atualizacao': inicio
+        })
+    db.session.execute(insert(Entrega), entregas)
+    db.session.execute(insert(Rastreamento), [
+        {'entrega_id': i, 'timestamp': inicio + timedelta(hours=i + evento), 'status_descricao': 'Evento'}
+        for i in range(1, TOTAL_ENTREGAS + 1) for evento in range(3)
+    ])
+    db.session.execute(insert(Comprovante), [
+        {'entrega_id': i, 'motorista_id': 1, 'tipo': 'canhoto', 'caminho_arquivo': f'{i}.jpg',
+         'data_envio': inicio, 'data_atualizacao': inicio}
+        for i in range(1, TOTAL_ENTREGAS + 1, 2)
+    ])
+    db.session.execute(insert(Devolucao), [
+        {'entrega_id': i, 'motorista_id': 1, 'data_devolucao': inicio, 'data_criacao': inicio,
+         'data_atualizacao': inicio, 'status': 'ativa'}
+        for i in range(1, TOTAL_ENTREGAS + 1, 40)
+    ])
+    db.session.commit()
+    db.session.execute(text('ANALYZE'))
+    db.session.commit()
+    yield
+    for modelo in (Devolucao, Comprovante, Rastreamento, Entrega, Motorista):
+        db.session.query(modelo).delete()
+    db.session.commit()
+
+
+def plano(consulta) -> str:
+    # Plano do planejador para a consulta exatamente como o ORM a emite.
+    compilada = consulta.statement.compile(db.engine, compile_kwargs={"literal_binds": True})
+    if db.engine.dialect.name == 'postgresql':
+        # Com poucas linhas o PostgreSQL prefere Seq Scan mesmo havendo índice;
+        # desligando-o, só sobra Seq Scan quando não há índice que sirva.
+        db.session.execute(text('SET LOCAL enable_seqscan = off'))
+        linhas = db.session.execute(text(f'EXPLAIN {compilada}')).scalars().all()
+        db.session.rollback()
+        return '\n'.join(linhas)
+    linhas = db.session.execute(text(f'EXPLAIN QUERY PLAN {compilada}')).all()
+    return '\n'.join(linha[-1] for linha in linhas)
+
+
+def assert_usa_indice(consulta, *tabelas, busca: bool = True):
+    texto = plano(consulta)
+    assert 'Seq Scan' not in texto, texto
+    for tabela in tabelas:
+        # No SQLite, "SCAN tabela" sem "USING ... INDEX" é leitura da tabela inteira.
+        assert not re.search(rf'\bSCAN {tabela}\b(?! USING (COVERING )?INDEX)', texto), texto
+    if busca:
+        # Filtros precisam descer pelo índice, não percorrer um índice inteiro.
+        if db.engine.dialect.name == 'postgresql':
+            assert 'Index' in texto, texto
+        else:
+            assert re.search(rf'\bSEARCH ({"|".join(tabelas)}) USING (COVERING )?INDEX', texto), texto
+
+
+def listagem(**args):
+    return ordenar_entregas(filtrar_entregas(Entrega.query, MultiDict(args)), args.pop('ordenar', None))
+
+
+def test_listagem_ordenada_por_dtfat(dados):
+    assert_usa_indice(listagem().limit(50), 'entregas', busca=False)
+
+
+def test_listagem_por_status(dados):
+    # Com LIMIT o planejador pode preferir percorrer o índice de DTFAT já ordenado.
+    assert_usa_indice(listagem(status='ENTREGA_PENDENTE').limit(50), 'entregas', busca=False)
+    assert_usa_indice(listagem(status='ENTREGA_PENDENTE').order_by(None), 'entregas')
+
+
+def test_busca_por_numnota(dados):
+    assert_usa_indice(listagem(num_nota='101234'), 'entregas')
+
+
+def test_busca_por_chavenfe(dados):
+    assert_usa_indice(Entrega.query.filter_by(CHAVENFE=f'{1234:044d}'), 'entregas')
+
+
+def test_entregas_do_motorista(dados):
+    assert_usa_indice(Entrega.query.filter(Entrega.motorista_id == 1), 'entregas')
+
+
+def test_varredura_de_rastreamento_das_abertas(dados):
+    consulta = MotorRastreamento().consulta_alvos(Entrega.PREVISAOENTREGA < datetime(2026, 2, 1))
+    assert_usa_indice(consulta, 'entregas')
+
+
+@pytest.mark.parametrize('consulta', [
+    lambda: Rastreamento.query.filter_by(entrega_id=1234).order_by(Rastreamento.timestamp.desc()),
+    lambda: Comprovante.query.filter_by(entrega_id=1234),
+    lambda: Devolucao.query.filter_by(entrega_id=1234),
+], ids=['rastreamento', 'comprovantes', 'devolucoes'])
+def test_consultas_por_entrega(dados, consulta):
+    assert_usa_indice(consulta(), 'rastreamento', 'comprovantes', 'devolucoes')